@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import weakref
+from src.printer_manager import get_shared_executor, shutdown_shared_executor
+
+DEFAULT_MAX_PENDING = 256  # Calls a single facade may have queued or running at once
+
+class AsyncPrinterManager:
+    """Awaitable facade over PrinterManager for asyncio services
+
+    Blocking spooler calls run on a shared bounded thread pool, so any number of
+    concurrent awaits from one event loop share a fixed set of threads. Each call
+    accepts a timeout that starts once the call is running on a worker, so time
+    spent queued behind other calls doesn't count against it. A call cancelled
+    while still queued is dropped, but a spooler call that has already started
+    runs to completion in its thread (a clear cannot be rolled back).
+    """
+
+    def __init__(self, printer_manager, executor=None, max_pending=DEFAULT_MAX_PENDING, timeout=None):
+        self.printer_manager = printer_manager
+        self.executor = executor or get_shared_executor()
+        self.timeout = timeout  # Default timeout in seconds for every call
+        self.max_pending = max_pending
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop -> its in-flight limit
+
+    async def _call(self, func, *args, timeout=None, **kwargs):
+        """Run a blocking PrinterManager method on the executor"""
+        if timeout is None:
+            timeout = self.timeout
+
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            # A facade may be shared across event loops (e.g. several asyncio.run calls)
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_pending)
+
+        async with semaphore:
+            started = loop.create_future()
+
+            def mark_started(*_):
+                if not started.done():
+                    started.set_result(None)
+
+            def call():
+                loop.call_soon_threadsafe(mark_started)
+                return func(*args, **kwargs)
+
+            future = loop.run_in_executor(self.executor, call)
+            # Also release the wait if the call is cancelled before it ever runs
+            future.add_done_callback(mark_started)
+            try:
+                await started
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+
+            try:
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                logging.warning(f"{func.__name__} timed out after {timeout}s")
+                raise
+
+    async def get_printers(self, timeout=None):
+        """Get list of available printers"""
+        return await self._call(self.printer_manager.get_printers, timeout=timeout)
+
+    async def get_queue_length(self, printer_name, timeout=None):
+        """Get number of jobs in print queue"""
+        return await self._call(self.printer_manager.get_queue_length, printer_name, timeout=timeout)
+
+    async def get_queue_snapshot(self, printer_name, timeout=None):
+        """Get depth, oldest job age, state and last action for a printer"""
+        return await self._call(self.printer_manager.get_queue_snapshot, printer_name, timeout=timeout)
+
+    async def is_printer_healthy(self, printer_name, timeout=None):
+        """Check whether a printer is online and free of jams/errors"""
+        return await self._call(self.printer_manager.is_printer_healthy, printer_name, timeout=timeout)
+
+    async def clear_queue(self, printer_name, timeout=None):
+        """Clear the print queue"""
+        return await self._call(self.printer_manager.clear_queue, printer_name, timeout=timeout)
+
+    async def check_queue(self, printer_name, timeout=None):
+        """Check and clear the print queue, failing over if the printer is offline"""
+        return await self._call(self.printer_manager.check_queue, printer_name, timeout=timeout)
+
+    async def service_queue(self, printer_name, clear_threshold=1, timeout=None):
+        """Run one monitoring pass over a printer's queue"""
+        return await self._call(self.printer_manager.service_queue, printer_name,
+                                clear_threshold=clear_threshold, timeout=timeout)
+
+    async def get_queue_lengths(self, printer_names, timeout=None, batch_timeout=None):
+        """Get queue lengths for many printers concurrently
+
+        timeout bounds each check once it is running; batch_timeout bounds the
+        whole batch, however long checks wait for a worker. Checks that fail,
+        time out or are unfinished at batch_timeout map to None.
+        """
+        tasks = {name: asyncio.ensure_future(self.get_queue_length(name, timeout=timeout))
+                 for name in printer_names}
+        if not tasks:
+            return {}
+
+        try:
+            await asyncio.wait(tasks.values(), timeout=batch_timeout)
+        finally:
+            for task in tasks.values():
+                task.cancel()  # No-op for finished checks
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        return {name: None if task.cancelled() or task.exception() else task.result()
+                for name, task in tasks.items()}
+
+    async def watch_queues(self, printer_names, interval=5.0, timeout=None):
+        """Yield an event whenever a printer's queue depth or state changes
+
+        Each event is a dict with 'printer', 'previous' and 'current' snapshots;
+        'previous' is None for the first observation of a printer.
+        """
+        last_seen = {}
+        while True:
+            snapshots = await asyncio.gather(
+                *(self.get_queue_snapshot(name, timeout=timeout) for name in printer_names),
+                return_exceptions=True)
+
+            for name, snapshot in zip(printer_names, snapshots):
+                if isinstance(snapshot, asyncio.TimeoutError):
+                    continue
+                if isinstance(snapshot, BaseException):
+                    raise snapshot
+                previous = last_seen.get(name)
+                if previous is None or (previous['depth'], previous['state']) != (snapshot['depth'], snapshot['state']):
+                    last_seen[name] = snapshot
+                    yield {'printer': name, 'previous': previous, 'current': snapshot}
+
+            await asyncio.sleep(interval)
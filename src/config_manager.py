@@ -5,9 +5,11 @@ import sys
 from pathlib import Path
 
 class ConfigManager:
-    def __init__(self):
+    def __init__(self, config_dir=None):
         # Use proper app data directory for settings
-        if getattr(sys, 'frozen', False):
+        if config_dir:
+            app_data = config_dir
+        elif getattr(sys, 'frozen', False):
             # Running as compiled exe
             app_data = os.path.join(os.environ.get('APPDATA', ''), 'PQManager')
         else:
@@ -20,7 +22,10 @@ class ConfigManager:
             'selected_printer': '',
             'monitoring_interval': 10000,  # 10 seconds
             'start_minimized': False,
-            'auto_start_monitoring': True
+            'auto_start_monitoring': True,
+            'printer_pools': {},  # pool name -> list of interchangeable printers
+            'monitored_printers': [],  # Extra printers shown in the status table
+            'status_refresh_interval': 5000  # 5 seconds
         }
         self._ensure_config_exists()
 
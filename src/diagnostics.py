@@ -0,0 +1,80 @@
+import ctypes
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+def start_memory_tracing(frames=10):
+    """Start tracemalloc so memory reports can show allocation sites"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        logging.info(f"Memory tracing started ({frames} frames)")
+
+def count_open_handles():
+    """Get the number of OS handles/file descriptors held by this process, or None if unknown"""
+    try:
+        if sys.platform == 'win32':
+            count = ctypes.c_ulong()
+            kernel32 = ctypes.windll.kernel32
+            if kernel32.GetProcessHandleCount(kernel32.GetCurrentProcess(), ctypes.byref(count)):
+                return count.value
+            return None
+        if os.path.isdir('/proc/self/fd'):
+            return len(os.listdir('/proc/self/fd'))
+    except Exception as e:
+        logging.error(f"Failed to count open handles: {e}")
+    return None
+
+def memory_summary():
+    """Collect a snapshot of process memory and resource counters"""
+    summary = {
+        'handles': count_open_handles(),
+        'threads': threading.active_count(),
+        'gc_objects': len(gc.get_objects()),
+        'gc_counts': gc.get_count(),
+        'traced_current': None,
+        'traced_peak': None,
+    }
+    if tracemalloc.is_tracing():
+        summary['traced_current'], summary['traced_peak'] = tracemalloc.get_traced_memory()
+    return summary
+
+def write_memory_report(log_dir='logs', top=25):
+    """Write a memory report for the running process next to the logs and return its path"""
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+        report_file = os.path.join(log_dir, f"memory_report_{time.strftime('%Y%m%d_%H%M%S')}.txt")
+        summary = memory_summary()
+
+        lines = [
+            f"PQManager memory report - {time.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Open handles: {summary['handles']}",
+            f"Threads: {summary['threads']} ({', '.join(t.name for t in threading.enumerate())})",
+            f"GC tracked objects: {summary['gc_objects']}",
+            f"GC generation counts: {summary['gc_counts']}",
+        ]
+
+        if tracemalloc.is_tracing():
+            lines.append(f"Traced memory: {summary['traced_current'] / 1024:.1f} KiB "
+                         f"(peak {summary['traced_peak'] / 1024:.1f} KiB)")
+            lines.append("")
+            lines.append(f"Top {top} allocation sites:")
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            for stat in snapshot.statistics('lineno')[:top]:
+                lines.append(f"  {stat}")
+        else:
+            lines.append("Memory tracing is off - start with --trace-memory for allocation sites")
+
+        with open(report_file, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        logging.info(f"Memory report written to {report_file}")
+        return report_file
+    except Exception as e:
+        logging.error(f"Error writing memory report: {e}")
+        return None
@@ -13,9 +13,13 @@ import win32api
 import winerror
 import win32con
 import win32gui
-from src.tray_manager import TrayManager
+from src.tray_manager import (TrayManager, STATUS_IDLE, STATUS_PENDING, STATUS_STUCK, STATUS_OFFLINE,
+                              STATUS_UPDATE_INTERVAL)
 from src.config_manager import ConfigManager
 from src.printer_manager import PrinterManager
+from src import diagnostics
+from src.profiler import SamplingProfiler, parse_profile_argument
+from src.status_view import PrinterStatusTable, StatusPoller
 import time
 
 def is_already_running():
@@ -27,7 +31,7 @@ def is_already_running():
         return False
 
 class Application:
-    def __init__(self):
+    def __init__(self, config_manager=None, monitor_interval=300000):
         # Create necessary directories
         os.makedirs('logs', exist_ok=True)
 
@@ -86,11 +90,14 @@ class Application:
         # Log startup with version
         logging.info("PQManager v1.1 starting up")
 
+        if '--trace-memory' in sys.argv:
+            diagnostics.start_memory_tracing()
+
         # Initialize the main window
         self.root = tk.Tk()
         self.root.title("PQ Manager v1.1")
-        self.root.geometry("300x200")
-        self.root.resizable(False, False)
+        self.root.geometry("560x360")
+        self.root.minsize(300, 200)
         
         # Disable error popups
         def custom_excepthook(exc_type, exc_value, exc_traceback):
@@ -101,20 +108,51 @@ class Application:
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
         # Initialize managers
-        self.config_manager = ConfigManager()
-        self.printer_manager = PrinterManager(self.config_manager)
+        self.config_manager = config_manager or ConfigManager()
+
+        # Optionally record spooler results and actions for offline policy tuning
+        self.trace_recorder = None
+        if '--record-trace' in sys.argv:
+            from src.spooler_trace import TraceRecorder
+            trace_file = os.path.join('logs', f"spooler_trace_{time.strftime('%Y%m%d_%H%M%S')}.jsonl.gz")
+            self.trace_recorder = TraceRecorder(win32print, trace_file)
+            self.trace_recorder.start_sampling()
+            atexit.register(self.trace_recorder.close)
+
+        self.printer_manager = PrinterManager(self.config_manager, spooler=self.trace_recorder)
         self.tray_manager = TrayManager(self.root)
+        self.tray_manager.add_menu_item('Memory Report', self.write_memory_report)
+
+        # On-demand profiler: tray menu, --profile[=SECONDS] or Ctrl+Break / SIGUSR1.
+        # Both triggers bypass the Tk thread so they still work while it is hung.
+        self.profiler = SamplingProfiler('logs')
+        self.tray_manager.add_menu_item('Start/Stop Profiler', self.profiler.toggle, tk_thread=False)
+        self.profiler.install_signal_handler()
+        profile_duration = parse_profile_argument(sys.argv)
+        if profile_duration:
+            self.profiler.start(profile_duration)
 
         # Global variables
         self.printer_var = tk.StringVar()
         self.is_monitoring = False
         self.monitor_id = None
+        self.monitor_interval = monitor_interval  # ms between monitoring passes, 5 minutes by default
+        self.queue_stuck = False  # Jobs survived the last monitoring pass or manual clear
+        self.tray_refresh_id = None
+        self._tray_snapshot = None  # Last poller snapshot shown on the tray icon
 
         # Create GUI
         self.create_gui()
+
+        # Poll queue status for the status table off the Tk thread
+        refresh_interval = self.config_manager.get_setting('status_refresh_interval', 5000)
+        self.status_poller = StatusPoller(self.printer_manager, self.status_table, refresh_interval / 1000)
         
         # Load saved settings and start monitoring
         self.load_saved_settings()
+        self.refresh_monitored_printers()
+        self.status_poller.start()
+        self.refresh_tray_status()
         
         # Hide window if started minimized
         if len(sys.argv) > 1 and '--minimized' in sys.argv:
@@ -135,21 +173,75 @@ class Application:
         try:
             if self.is_monitoring and self.printer_var.get() and self.printer_var.get() != "Select Printer":
                 printer_name = self.printer_var.get()
-                # Only clear queue if there are 2 or more jobs
-                queue_length = self.printer_manager.get_queue_length(printer_name)
-                if queue_length > 1:  
-                    if self.printer_manager.clear_queue(printer_name):
-                        pass
+                # Re-route jobs off a failed pooled printer, or clear if there are 2 or more jobs
+                self.printer_manager.service_queue(printer_name, clear_threshold=1)
+                # Pool peers that go offline or jam get their jobs re-routed too, never cleared
+                self.printer_manager.service_pool_peers(printer_name)
+                self.update_tray_status(printer_name)
             
-            # Schedule next check every 5 minutes
+            # Schedule next check
             if self.is_monitoring:
-                self.monitor_id = self.root.after(300000, self.monitor_queue)  
+                self.monitor_id = self.root.after(self.monitor_interval, self.monitor_queue)
                 
         except Exception as e:
             logging.error(f"Error in monitor_queue: {e}")
             # Ensure monitoring continues even after error
             if self.is_monitoring:
-                self.monitor_id = self.root.after(300000, self.monitor_queue)
+                self.monitor_id = self.root.after(self.monitor_interval, self.monitor_queue)
+
+    def update_tray_status(self, printer_name):
+        """Reflect the printer's queue state on the tray icon right after a monitoring pass or clear"""
+        try:
+            # One GetPrinter + EnumJobs round trip covers both depth and health
+            snapshot = self.printer_manager.get_queue_snapshot(printer_name)
+            # Jobs that survived a pass that should have cleared them mean the queue is stuck
+            self.queue_stuck = snapshot['depth'] > 1
+            self.apply_tray_status(snapshot)
+        except Exception as e:
+            logging.error(f"Error updating tray status: {e}")
+
+    def apply_tray_status(self, snapshot):
+        """Show a queue snapshot on the tray icon"""
+        queue_length = snapshot['depth']
+        if queue_length <= 1:
+            self.queue_stuck = False
+        if not snapshot['healthy']:
+            state = STATUS_OFFLINE
+        elif queue_length > 1 and self.queue_stuck:
+            state = STATUS_STUCK
+        elif queue_length:
+            state = STATUS_PENDING
+        else:
+            state = STATUS_IDLE
+        self.tray_manager.update_status(state, queue_length)
+
+    def refresh_tray_status(self):
+        """Keep the tray live from the status poller's snapshots of the selected printer"""
+        try:
+            snapshot = self.status_poller.snapshots.get(self.printer_var.get())
+            if snapshot is not None and snapshot is not self._tray_snapshot:
+                self._tray_snapshot = snapshot
+                self.apply_tray_status(snapshot)
+        except Exception as e:
+            logging.error(f"Error refreshing tray status: {e}")
+        self.tray_refresh_id = self.root.after(int(STATUS_UPDATE_INTERVAL * 1000), self.refresh_tray_status)
+
+    def get_monitored_printers(self):
+        """Get the selected printer, its pool peers and any extra configured printers"""
+        printers = []
+        selected_printer = self.printer_var.get()
+        if selected_printer and selected_printer != "Select Printer":
+            printers.append(selected_printer)
+            printers.extend(self.printer_manager.get_pool_peers(selected_printer))
+        printers.extend(self.config_manager.get_setting('monitored_printers', []) or [])
+        return list(dict.fromkeys(printers))
+
+    def refresh_monitored_printers(self):
+        """Point the status table at the current set of monitored printers"""
+        printers = self.get_monitored_printers()
+        self.status_poller.set_printers(printers)
+        if self.trace_recorder:
+            self.trace_recorder.set_printers(printers)
 
     def start_monitoring(self):
         """Start monitoring with status check"""
@@ -185,6 +277,7 @@ class Application:
             
             # Start new monitoring
             self.start_monitoring()
+            self.refresh_monitored_printers()
             
     def create_gui(self):
         """Create the GUI"""
@@ -210,6 +303,7 @@ class Application:
                     logging.info("Queue cleared successfully")
                 else:
                     logging.warning("Failed to clear queue completely")
+                self.update_tray_status(selected_printer)
 
         clear_button = ttk.Button(
             frame, 
@@ -220,7 +314,11 @@ class Application:
 
         # Bottom attribution
         author_label = ttk.Label(frame, text="by James", font=('Segoe UI', 8, 'italic'))
-        author_label.pack(side='right', padx=5, pady=(10, 0))
+        author_label.pack(side='bottom', anchor='e', padx=5, pady=(10, 0))
+
+        # Status of every monitored printer
+        self.status_table = PrinterStatusTable(frame, self.root)
+        self.status_table.frame.pack(expand=True, fill='both', pady=(5, 0))
 
     def load_saved_settings(self):
         """Load saved printer and monitoring status"""
@@ -251,12 +349,22 @@ class Application:
         """Clean up resources before exit"""
         try:
             self.stop_monitoring()
+            self.profiler.stop()
+            self.status_poller.stop()
+            self.status_table.stop()
+            if self.tray_refresh_id:
+                self.root.after_cancel(self.tray_refresh_id)
+                self.tray_refresh_id = None
             if self.monitor_id:
                 self.root.after_cancel(self.monitor_id)
                 self.monitor_id = None
         except Exception as e:
             logging.error(f"Error during cleanup: {e}")
 
+    def write_memory_report(self):
+        """Write an in-process memory/handle report to the logs folder"""
+        return diagnostics.write_memory_report('logs')
+
     def show_window(self):
         """Show the main window"""
         self.root.deiconify()
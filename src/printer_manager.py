@@ -1,10 +1,18 @@
-import win32print
-import win32api
-import win32con
 import logging
 import time
 import ctypes
 import sys
+import threading
+import concurrent.futures
+from datetime import datetime, timezone
+
+# Import win32 modules conditionally so a recorded spooler trace can be replayed off Windows
+try:
+    import win32print
+    import win32api
+    import win32con
+except ImportError:
+    win32print = None
 
 # Import win32timezone conditionally
 try:
@@ -12,9 +20,51 @@ try:
 except ImportError:
     logging.warning("win32timezone not available, some functionality may be limited")
 
+# Printer states that mean queued jobs will not print until someone intervenes
+UNHEALTHY_PRINTER_STATUS_NAMES = (
+    'PRINTER_STATUS_OFFLINE',
+    'PRINTER_STATUS_ERROR',
+    'PRINTER_STATUS_PAPER_JAM',
+    'PRINTER_STATUS_PAPER_OUT',
+    'PRINTER_STATUS_PAPER_PROBLEM',
+    'PRINTER_STATUS_DOOR_OPEN',
+    'PRINTER_STATUS_NOT_AVAILABLE',
+    'PRINTER_STATUS_USER_INTERVENTION',
+)
+
+DEFAULT_MAX_WORKERS = 16  # Threads shared by every background spooler caller
+
+_shared_executor = None
+_shared_executor_lock = threading.Lock()
+
+def get_shared_executor(max_workers=DEFAULT_MAX_WORKERS):
+    """Get the process-wide bounded executor used for blocking spooler calls off the Tk thread"""
+    global _shared_executor
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            _shared_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="PrinterManager")
+        return _shared_executor
+
+def shutdown_shared_executor(wait=True):
+    """Shut down the shared executor; the next call creates a fresh one"""
+    global _shared_executor
+    with _shared_executor_lock:
+        executor, _shared_executor = _shared_executor, None
+    if executor:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
 class PrinterManager:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, spooler=None, clock=None):
         self.config_manager = config_manager
+        # Spooler API (win32print or a recording/replay stand-in) and time source
+        self.spooler = spooler or win32print
+        self.clock = clock or time
+        self.last_actions = {}  # printer name -> (timestamp, description)
+        self.copied_jobs = set()  # (printer name, job id) copied to a peer but not yet deleted
+        self.unhealthy_status = 0
+        for name in UNHEALTHY_PRINTER_STATUS_NAMES:
+            self.unhealthy_status |= getattr(self.spooler, name)
         # Only log if not admin
         if not self.is_admin():
             logging.warning("Application is not running with administrator rights")
@@ -42,15 +92,15 @@ class PrinterManager:
             return 0
 
         try:
-            handle = {"DesiredAccess": win32print.PRINTER_ALL_ACCESS}
+            handle = {"DesiredAccess": self.spooler.PRINTER_ALL_ACCESS}
             printer_handle = None
             try:
-                printer_handle = win32print.OpenPrinter(printer_name, handle)
+                printer_handle = self.spooler.OpenPrinter(printer_name, handle)
                 if not printer_handle:
                     logging.error(f"Failed to get printer handle for {printer_name}")
                     return 0
                 
-                jobs = win32print.EnumJobs(printer_handle, 0, -1, 1)
+                jobs = self.spooler.EnumJobs(printer_handle, 0, -1, 1)
                 count = len(jobs)
                 # Only log if there are multiple jobs in the queue
                 if count > 1:
@@ -59,7 +109,7 @@ class PrinterManager:
                 
             finally:
                 if printer_handle:
-                    win32print.ClosePrinter(printer_handle)
+                    self.spooler.ClosePrinter(printer_handle)
                     
         except Exception as e:
             logging.error(f"Failed to get queue length: {e}")
@@ -70,13 +120,13 @@ class PrinterManager:
     def _get_queue_length_basic(self, printer_name):
         """Fallback method for getting queue length without win32timezone"""
         try:
-            handle = {"DesiredAccess": win32print.PRINTER_ALL_ACCESS}
-            printer_handle = win32print.OpenPrinter(printer_name, handle)
+            handle = {"DesiredAccess": self.spooler.PRINTER_ALL_ACCESS}
+            printer_handle = self.spooler.OpenPrinter(printer_name, handle)
             try:
-                jobs = win32print.EnumJobs(printer_handle, 0, -1, 1)
+                jobs = self.spooler.EnumJobs(printer_handle, 0, -1, 1)
                 return len(jobs)
             finally:
-                win32print.ClosePrinter(printer_handle)
+                self.spooler.ClosePrinter(printer_handle)
         except Exception as e:
             logging.error(f"Basic queue length check failed: {e}")
             return 0
@@ -84,27 +134,27 @@ class PrinterManager:
     def _get_job_status_string(self, status):
         """Convert job status to readable string"""
         status_flags = []
-        if status & win32print.JOB_STATUS_PAUSED:
+        if status & self.spooler.JOB_STATUS_PAUSED:
             status_flags.append("Paused")
-        if status & win32print.JOB_STATUS_ERROR:
+        if status & self.spooler.JOB_STATUS_ERROR:
             status_flags.append("Error")
-        if status & win32print.JOB_STATUS_DELETING:
+        if status & self.spooler.JOB_STATUS_DELETING:
             status_flags.append("Deleting")
-        if status & win32print.JOB_STATUS_SPOOLING:
+        if status & self.spooler.JOB_STATUS_SPOOLING:
             status_flags.append("Spooling")
-        if status & win32print.JOB_STATUS_PRINTING:
+        if status & self.spooler.JOB_STATUS_PRINTING:
             status_flags.append("Printing")
-        if status & win32print.JOB_STATUS_OFFLINE:
+        if status & self.spooler.JOB_STATUS_OFFLINE:
             status_flags.append("Offline")
-        if status & win32print.JOB_STATUS_PAPEROUT:
+        if status & self.spooler.JOB_STATUS_PAPEROUT:
             status_flags.append("Paper Out")
-        if status & win32print.JOB_STATUS_PRINTED:
+        if status & self.spooler.JOB_STATUS_PRINTED:
             status_flags.append("Printed")
-        if status & win32print.JOB_STATUS_DELETED:
+        if status & self.spooler.JOB_STATUS_DELETED:
             status_flags.append("Deleted")
-        if status & win32print.JOB_STATUS_BLOCKED_DEVQ:
+        if status & self.spooler.JOB_STATUS_BLOCKED_DEVQ:
             status_flags.append("Blocked")
-        if status & win32print.JOB_STATUS_USER_INTERVENTION:
+        if status & self.spooler.JOB_STATUS_USER_INTERVENTION:
             status_flags.append("Needs User Intervention")
         return ", ".join(status_flags) if status_flags else "Unknown"
 
@@ -114,16 +164,16 @@ class PrinterManager:
             return False
 
         try:
-            handle = {"DesiredAccess": win32print.PRINTER_ALL_ACCESS}
-            printer_handle = win32print.OpenPrinter(printer_name, handle)
+            handle = {"DesiredAccess": self.spooler.PRINTER_ALL_ACCESS}
+            printer_handle = self.spooler.OpenPrinter(printer_name, handle)
             
             try:
                 # Get printer info to check if it's a receipt printer
-                printer_info = win32print.GetPrinter(printer_handle, 2)
+                printer_info = self.spooler.GetPrinter(printer_handle, 2)
                 is_receipt_printer = any(keyword in printer_info['pDriverName'].lower() 
                                       for keyword in ['receipt', 'pos', 'thermal', 'epson', 'star'])
                 
-                jobs = win32print.EnumJobs(printer_handle, 0, -1, 1)
+                jobs = self.spooler.EnumJobs(printer_handle, 0, -1, 1)
                 if not jobs:
                     return True
 
@@ -139,27 +189,27 @@ class PrinterManager:
                         job_id = job['JobId']
                         
                         # For receipt printers, be more aggressive with completed jobs
-                        if is_receipt_printer and (job['Status'] & win32print.JOB_STATUS_PRINTED):
+                        if is_receipt_printer and (job['Status'] & self.spooler.JOB_STATUS_PRINTED):
                             try:
-                                win32print.SetJob(printer_handle, job_id, 0, None, win32print.JOB_CONTROL_DELETE)
+                                self.spooler.SetJob(printer_handle, job_id, 0, None, self.spooler.JOB_CONTROL_DELETE)
                                 continue
                             except Exception as e:
                                 logging.error(f"Failed to clear completed receipt job {job_id}: {e}")
                         
                         # Try to cancel first
                         try:
-                            win32print.SetJob(printer_handle, job_id, 0, None, win32print.JOB_CONTROL_CANCEL)
+                            self.spooler.SetJob(printer_handle, job_id, 0, None, self.spooler.JOB_CONTROL_CANCEL)
                             if is_receipt_printer:
-                                time.sleep(0.2)
+                                self.clock.sleep(0.2)
                         except Exception as e:
                             if "parameter is incorrect" not in str(e).lower():
                                 logging.error(f"Failed to cancel job {job_id}: {e}")
                         
                         # Then try to delete
                         try:
-                            win32print.SetJob(printer_handle, job_id, 0, None, win32print.JOB_CONTROL_DELETE)
+                            self.spooler.SetJob(printer_handle, job_id, 0, None, self.spooler.JOB_CONTROL_DELETE)
                             if is_receipt_printer:
-                                time.sleep(0.2)
+                                self.clock.sleep(0.2)
                         except Exception as e:
                             if "parameter is incorrect" not in str(e).lower():
                                 logging.error(f"Failed to delete job {job_id}: {e}")
@@ -171,18 +221,19 @@ class PrinterManager:
                             logging.error(f"Failed to process job {job_id}: {e}")
 
                 # Verify queue is actually empty
-                remaining_jobs = win32print.EnumJobs(printer_handle, 0, -1, 1)
+                remaining_jobs = self.spooler.EnumJobs(printer_handle, 0, -1, 1)
                 if remaining_jobs:
                     if len(remaining_jobs) > 1:  # Only log if multiple jobs remained
                         logging.error(f"{len(remaining_jobs)} jobs could not be cleared from {printer_name}")
                     success = False
                 elif job_count > 1:  # Only log success if we cleared multiple jobs
                     logging.info(f"Successfully cleared {job_count} jobs from {printer_name}")
+                self._record_action(printer_name, f"Cleared {job_count - len(remaining_jobs)} jobs")
                 
                 return success
                 
             finally:
-                win32print.ClosePrinter(printer_handle)
+                self.spooler.ClosePrinter(printer_handle)
                 
         except Exception as e:
             logging.error(f"Failed to clear print queue: {e}")
@@ -191,33 +242,285 @@ class PrinterManager:
     def check_queue(self, printer_name):
         """Check and clear the print queue for the specified printer"""
         try:
-            printer_handle = win32print.OpenPrinter(printer_name)
+            printer_handle = self.spooler.OpenPrinter(printer_name)
             try:
                 # Get printer status
-                printer_info = win32print.GetPrinter(printer_handle, 2)
+                printer_info = self.spooler.GetPrinter(printer_handle, 2)
                 status = printer_info['Status']
-                
-                if status & win32print.PRINTER_STATUS_OFFLINE:
-                    logging.warning(f"Printer {printer_name} is offline")
-                    return False
+
+                if not self._is_status_healthy(status, printer_info['Attributes']):
+                    if self.get_pool_peers(printer_name):
+                        logging.warning(f"Printer {printer_name} is unavailable, re-routing jobs to its pool")
+                        # Never purge a pooled printer; jobs that couldn't move are retried next check
+                        return self.failover_queue(printer_name)
+                    if status & self.spooler.PRINTER_STATUS_OFFLINE:
+                        logging.warning(f"Printer {printer_name} is offline")
+                        return False
                     
                 # Check for jobs
-                jobs = win32print.EnumJobs(printer_handle, 0, -1, 1)
+                jobs = self.spooler.EnumJobs(printer_handle, 0, -1, 1)
                 if jobs:
                     logging.info(f"Found {len(jobs)} jobs in queue for {printer_name}")
                     # Clear the queue
-                    win32print.SetPrinter(printer_handle, 0, None, win32print.PRINTER_CONTROL_PURGE)
+                    self.spooler.SetPrinter(printer_handle, 0, None, self.spooler.PRINTER_CONTROL_PURGE)
                     logging.info(f"Successfully cleared {len(jobs)} jobs from {printer_name}")
                     return True
                 return False
                     
             finally:
-                win32print.ClosePrinter(printer_handle)
+                self.spooler.ClosePrinter(printer_handle)
                 
         except Exception as e:
             logging.error(f"Error checking/clearing queue for {printer_name}: {str(e)}")
             return False
 
+    def get_printer_status(self, printer_name):
+        """Get (status, attributes) flags for a printer, or None if it can't be queried"""
+        if not printer_name or printer_name == "Select Printer":
+            return None
+
+        try:
+            printer_handle = self.spooler.OpenPrinter(printer_name)
+            try:
+                printer_info = self.spooler.GetPrinter(printer_handle, 2)
+                return printer_info['Status'], printer_info['Attributes']
+            finally:
+                self.spooler.ClosePrinter(printer_handle)
+        except Exception as e:
+            logging.error(f"Failed to get status for {printer_name}: {e}")
+            return None
+
+    def is_printer_healthy(self, printer_name):
+        """Check whether a printer is online and free of jams/errors"""
+        printer_status = self.get_printer_status(printer_name)
+        if printer_status is None:
+            return False
+        return self._is_status_healthy(*printer_status)
+
+    def _is_status_healthy(self, status, attributes):
+        """Check printer status/attribute flags for offline, jam and error conditions"""
+        if attributes & self.spooler.PRINTER_ATTRIBUTE_WORK_OFFLINE:
+            return False
+        return not (status & self.unhealthy_status)
+
+    def _get_printer_status_string(self, status, attributes=0):
+        """Convert printer status to readable string"""
+        if attributes & self.spooler.PRINTER_ATTRIBUTE_WORK_OFFLINE:
+            return "Offline"
+        status_names = (
+            ('PRINTER_STATUS_OFFLINE', "Offline"),
+            ('PRINTER_STATUS_PAPER_JAM', "Paper Jam"),
+            ('PRINTER_STATUS_PAPER_OUT', "Paper Out"),
+            ('PRINTER_STATUS_PAPER_PROBLEM', "Paper Problem"),
+            ('PRINTER_STATUS_DOOR_OPEN', "Door Open"),
+            ('PRINTER_STATUS_NOT_AVAILABLE', "Not Available"),
+            ('PRINTER_STATUS_USER_INTERVENTION', "Needs User Intervention"),
+            ('PRINTER_STATUS_ERROR', "Error"),
+            ('PRINTER_STATUS_PAUSED', "Paused"),
+        )
+        status_flags = [text for name, text in status_names if status & getattr(self.spooler, name, 0)]
+        return ", ".join(status_flags) if status_flags else "Ready"
+
+    def _record_action(self, printer_name, description):
+        """Remember the last action taken on a printer for the status view"""
+        self.last_actions[printer_name] = (self.clock.time(), description)
+
+    def _job_age(self, job, now):
+        """Seconds since a job was submitted, or None if unknown"""
+        submitted = job.get('Submitted')
+        if submitted is None:
+            return None
+        try:
+            if submitted.tzinfo is None:
+                # Spooler submission times are UTC
+                submitted = submitted.replace(tzinfo=timezone.utc)
+            return max(0.0, (now - submitted).total_seconds())
+        except Exception:
+            return None
+
+    def get_queue_snapshot(self, printer_name):
+        """Get depth, oldest job age, health, state and last action for a printer in one spooler round trip"""
+        snapshot = {'depth': 0, 'oldest_age': None, 'healthy': False, 'state': "Unknown", 'last_action': None}
+        last_action = self.last_actions.get(printer_name)
+        if last_action:
+            timestamp, description = last_action
+            snapshot['last_action'] = f"{time.strftime('%H:%M:%S', time.localtime(timestamp))} {description}"
+
+        try:
+            printer_handle = self.spooler.OpenPrinter(printer_name)
+            try:
+                printer_info = self.spooler.GetPrinter(printer_handle, 2)
+                jobs = self.spooler.EnumJobs(printer_handle, 0, -1, 1)
+            finally:
+                self.spooler.ClosePrinter(printer_handle)
+
+            now = datetime.now(timezone.utc)
+            ages = [age for age in (self._job_age(job, now) for job in jobs) if age is not None]
+            snapshot['depth'] = len(jobs)
+            snapshot['oldest_age'] = max(ages) if ages else None
+            snapshot['healthy'] = self._is_status_healthy(printer_info['Status'], printer_info['Attributes'])
+            snapshot['state'] = self._get_printer_status_string(printer_info['Status'], printer_info['Attributes'])
+        except Exception as e:
+            logging.error(f"Failed to get queue snapshot for {printer_name}: {e}")
+            snapshot['state'] = "Error"
+        return snapshot
+
+    def get_pool_peers(self, printer_name):
+        """Get the other printers that share a configured pool with this printer"""
+        if not self.config_manager:
+            return []
+
+        pools = self.config_manager.get_setting('printer_pools', {}) or {}
+        peers = []
+        for members in pools.values():
+            if printer_name in members:
+                peers.extend(m for m in members if m != printer_name and m not in peers)
+        return peers
+
+    def failover_queue(self, printer_name):
+        """Re-route queued jobs from an unhealthy printer to the least busy healthy pool peer"""
+        peers = self.get_pool_peers(printer_name)
+        if not peers:
+            return False
+
+        # Current depth of each healthy peer, used to spread jobs across the pool
+        depths = {peer: self.get_queue_length(peer) for peer in peers if self.is_printer_healthy(peer)}
+        if not depths:
+            logging.warning(f"No healthy printer available in pool for {printer_name}")
+            return False
+
+        try:
+            handle = {"DesiredAccess": self.spooler.PRINTER_ALL_ACCESS}
+            printer_handle = self.spooler.OpenPrinter(printer_name, handle)
+            try:
+                jobs = self.spooler.EnumJobs(printer_handle, 0, -1, 1)
+                if not jobs:
+                    return True
+
+                # Jobs still being spooled have no complete data to move yet; they go next cycle
+                movable = [job for job in jobs
+                           if not job['Status'] & (self.spooler.JOB_STATUS_SPOOLING | self.spooler.JOB_STATUS_DELETING)]
+
+                # Forget copied jobs that have since left the queue
+                queued = {(printer_name, job['JobId']) for job in jobs}
+                self.copied_jobs = {key for key in self.copied_jobs
+                                    if key[0] != printer_name or key in queued}
+
+                moved = 0
+                for job in movable:
+                    if (printer_name, job['JobId']) in self.copied_jobs:
+                        # Already queued on a peer; only the delete is retried, never the copy
+                        if self._delete_copied_job(printer_handle, printer_name, job['JobId']):
+                            moved += 1
+                        continue
+                    target = min(depths, key=depths.get)
+                    if self._transfer_job(printer_handle, printer_name, job, target):
+                        depths[target] += 1
+                        moved += 1
+
+                logging.info(f"Re-routed {moved} of {len(movable)} jobs from {printer_name}")
+                self._record_action(printer_name, f"Re-routed {moved} jobs")
+                return moved == len(movable)
+
+            finally:
+                self.spooler.ClosePrinter(printer_handle)
+
+        except Exception as e:
+            logging.error(f"Failed to re-route jobs from {printer_name}: {e}")
+            return False
+
+    def _transfer_job(self, printer_handle, printer_name, job, target_name):
+        """Copy a spooled job to another printer and delete the original
+
+        If the copy succeeds but the original can't be deleted, the original stays
+        paused and is only ever deleted, not copied again, so it can't print twice.
+        """
+        job_id = job['JobId']
+        try:
+            # Hold the job so the source can't start printing it mid-transfer
+            self.spooler.SetJob(printer_handle, job_id, 0, None, self.spooler.JOB_CONTROL_PAUSE)
+
+            job_handle = self.spooler.OpenPrinter(f"{printer_name},Job {job_id}")
+            try:
+                chunks = []
+                while True:
+                    chunk = self.spooler.ReadPrinter(job_handle, 65536)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+            finally:
+                self.spooler.ClosePrinter(job_handle)
+
+            target_handle = self.spooler.OpenPrinter(target_name)
+            try:
+                doc_info = (job['pDocument'] or f"Job {job_id}", None, job['pDatatype'] or "RAW")
+                self.spooler.StartDocPrinter(target_handle, 1, doc_info)
+                try:
+                    self.spooler.WritePrinter(target_handle, b"".join(chunks))
+                finally:
+                    self.spooler.EndDocPrinter(target_handle)
+            finally:
+                self.spooler.ClosePrinter(target_handle)
+
+        except Exception as e:
+            logging.error(f"Failed to move job {job_id} from {printer_name} to {target_name}: {e}")
+            try:
+                self.spooler.SetJob(printer_handle, job_id, 0, None, self.spooler.JOB_CONTROL_RESUME)
+            except Exception:
+                pass
+            return False
+
+        # The job is now queued on the target; from here on the original must never resume
+        self.copied_jobs.add((printer_name, job_id))
+        logging.info(f"Copied job {job_id} from {printer_name} to {target_name}")
+        self._delete_copied_job(printer_handle, printer_name, job_id)
+        return True
+
+    def _delete_copied_job(self, printer_handle, printer_name, job_id):
+        """Delete the paused original of a job that was copied to a pool peer"""
+        try:
+            self.spooler.SetJob(printer_handle, job_id, 0, None, self.spooler.JOB_CONTROL_DELETE)
+        except Exception as e:
+            logging.error(f"Job {job_id} was moved but could not be deleted from {printer_name}, "
+                          f"leaving it paused: {e}")
+            return False
+        self.copied_jobs.discard((printer_name, job_id))
+        return True
+
+    def service_pool_peers(self, printer_name):
+        """Re-route jobs off every offline or jammed printer that shares a pool with printer_name
+
+        Peers are never cleared. Returns {peer: 'failover' or 'failover_pending'}
+        for the peers that needed re-routing.
+        """
+        actions = {}
+        for peer in self.get_pool_peers(printer_name):
+            snapshot = self.get_queue_snapshot(peer)
+            if snapshot['depth'] and not snapshot['healthy']:
+                actions[peer] = 'failover' if self.failover_queue(peer) else 'failover_pending'
+        return actions
+
+    def service_queue(self, printer_name, clear_threshold=1):
+        """Run one monitoring pass over a printer's queue
+
+        Jobs on an offline or jammed printer that belongs to a pool are re-routed
+        to a healthy peer and never cleared; jobs that could not be moved stay
+        queued for the next pass. Otherwise a queue deeper than clear_threshold
+        is cleared. Returns the action taken ('failover', 'failover_pending',
+        'cleared') or None.
+        """
+        queue_length = self.get_queue_length(printer_name)
+        if queue_length == 0:
+            return None
+
+        if self.get_pool_peers(printer_name) and not self.is_printer_healthy(printer_name):
+            return 'failover' if self.failover_queue(printer_name) else 'failover_pending'
+
+        if queue_length > clear_threshold:
+            if self.clear_queue(printer_name):
+                return 'cleared'
+        return None
+
     def is_admin(self):
         """Check if running with admin rights"""
         try:
@@ -228,8 +531,8 @@ class PrinterManager:
     def get_printers(self):
         """Get list of available printers"""
         try:
-            flags = win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS
-            printer_info = win32print.EnumPrinters(flags, None, 1)
+            flags = self.spooler.PRINTER_ENUM_LOCAL | self.spooler.PRINTER_ENUM_CONNECTIONS
+            printer_info = self.spooler.EnumPrinters(flags, None, 1)
             printers = [printer[2] for printer in printer_info]
             logging.info(f"Found printers: {printers}")
             return printers
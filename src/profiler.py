@@ -0,0 +1,185 @@
+import collections
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+DEFAULT_DURATION = 30  # Seconds to profile when no duration is given
+DEFAULT_INTERVAL = 0.005  # Seconds between samples
+
+class SamplingProfiler:
+    """Low-overhead sampling profiler covering every thread in the process
+
+    Stacks are sampled from sys._current_frames() on a background thread and
+    written as collapsed stacks (one "thread;outer;...;inner count" line per
+    stack), the input format of flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self, log_dir='logs', interval=DEFAULT_INTERVAL):
+        self.log_dir = log_dir
+        self.interval = interval
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._signal_sockets = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration=DEFAULT_DURATION):
+        """Start sampling for up to duration seconds; returns False if already running"""
+        with self._lock:
+            if self.is_running:
+                return False
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(duration,), name="SamplingProfiler", daemon=True)
+            self._thread.start()
+        logging.info(f"Profiler started for up to {duration}s")
+        return True
+
+    def stop(self):
+        """Stop sampling early; the profile is still written"""
+        self._stop_event.set()
+
+    def toggle(self, duration=DEFAULT_DURATION):
+        """Start the profiler, or stop it if it is already running"""
+        if self.is_running and not self._stop_event.is_set():
+            self.stop()
+            return
+
+        if self.is_running:
+            # A stopped run is still writing its profile; let it finish before starting again
+            self._thread.join(timeout=5)
+            if self.is_running:
+                logging.warning("Profiler is still writing the previous profile, not restarting")
+                return
+        self.start(duration)
+
+    def _run(self, duration):
+        counts = collections.Counter()
+        own_ident = threading.get_ident()
+        samples = 0
+        started = time.monotonic()
+        deadline = started + duration
+
+        while not self._stop_event.wait(self.interval) and time.monotonic() < deadline:
+            try:
+                self._sample(counts, own_ident)
+                samples += 1
+            except Exception as e:
+                logging.error(f"Profiler sampling error: {e}")
+                break
+
+        self._write(counts, samples, time.monotonic() - started)
+
+    def _sample(self, counts, own_ident):
+        """Record the current stack of every thread except the profiler itself
+
+        Only (thread, code objects) tuples are counted here to keep time under
+        the GIL short; frames are formatted once when the profile is written.
+        """
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            counts[(ident, tuple(stack))] += 1
+
+    def _write(self, counts, samples, elapsed):
+        """Write collapsed stacks next to the logs"""
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+            base_name = os.path.join(self.log_dir, f"profile_{time.strftime('%Y%m%d_%H%M%S')}")
+            profile_file = f"{base_name}.folded"
+            suffix = 1
+            while os.path.exists(profile_file):
+                # Back-to-back runs within a second must not overwrite each other
+                profile_file = f"{base_name}_{suffix}.folded"
+                suffix += 1
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            frame_names = {}
+
+            def frame_name(code):
+                if code not in frame_names:
+                    frame_names[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                return frame_names[code]
+
+            # Stacks that differ only by thread ident collapse onto the same line
+            collapsed = collections.Counter()
+            for (ident, stack), count in counts.items():
+                # Semicolons separate frames in the collapsed format
+                thread_name = thread_names.get(ident, f"Thread-{ident}").replace(';', ':')
+                frames = [frame_name(code) for code in reversed(stack)]
+                collapsed[";".join([thread_name] + frames)] += count
+
+            with open(profile_file, 'w') as f:
+                for stack, count in collapsed.most_common():
+                    f.write(f"{stack} {count}\n")
+            logging.info(f"Profiler wrote {samples} samples over {elapsed:.1f}s to {profile_file}")
+        except Exception as e:
+            logging.error(f"Error writing profile: {e}")
+
+    def install_signal_handler(self, duration=DEFAULT_DURATION):
+        """Toggle the profiler on SIGBREAK (Ctrl+Break) on Windows or SIGUSR1 elsewhere
+
+        Python signal handlers only run on the main thread, which is the Tk thread,
+        so a hung Tk loop would never see the signal. Instead the signal number is
+        handed to a watcher thread through signal.set_wakeup_fd, which is written
+        from the C-level handler the moment the signal arrives.
+        """
+        signum = getattr(signal, 'SIGBREAK', None) or getattr(signal, 'SIGUSR1', None)
+        if signum is None:
+            return False
+
+        receiver, sender = socket.socketpair()
+        sender.setblocking(False)
+        try:
+            # Only the main thread may install handlers or the wakeup fd
+            previous = signal.set_wakeup_fd(sender.fileno(), warn_on_full_buffer=False)
+            if previous != -1:
+                signal.set_wakeup_fd(previous)
+                raise ValueError("a signal wakeup fd is already installed")
+            # The watcher does the work; the handler only replaces the default action
+            signal.signal(signum, lambda sig, frame: None)
+        except (ValueError, OSError) as e:
+            logging.error(f"Could not install profiler signal handler: {e}")
+            receiver.close()
+            sender.close()
+            return False
+
+        self._signal_sockets = (receiver, sender)  # Keep the wakeup socket open
+        threading.Thread(target=self._watch_signal, args=(receiver, signum, duration),
+                         name="ProfilerSignal", daemon=True).start()
+        return True
+
+    def _watch_signal(self, receiver, signum, duration):
+        """Toggle the profiler for every delivery of signum written to the wakeup socket"""
+        while True:
+            try:
+                data = receiver.recv(64)
+            except OSError:
+                return
+            if not data:
+                return
+            for _ in range(data.count(signum)):
+                self.toggle(duration)
+
+def parse_profile_argument(argv):
+    """Get the duration requested by --profile or --profile=SECONDS, or None if absent"""
+    for arg in argv:
+        if arg == '--profile':
+            return DEFAULT_DURATION
+        if arg.startswith('--profile='):
+            try:
+                return float(arg.split('=', 1)[1])
+            except ValueError:
+                logging.error(f"Invalid profile duration: {arg}")
+                return DEFAULT_DURATION
+    return None
@@ -0,0 +1,188 @@
+"""
+In-memory stand-in for the parts of win32print that PQManager uses
+
+Shared by the soak test harness, spooler trace replay and the tests.
+"""
+
+import functools
+import random
+import threading
+import types
+
+
+class SpoolerError(Exception):
+    """Stand-in for pywintypes.error raised by the simulated spooler"""
+
+
+class SimulatedSpooler:
+    """In-memory stand-in for the parts of win32print that PQManager uses"""
+
+    # Real win32print constant values
+    CONSTANTS = {
+        'PRINTER_ALL_ACCESS': 0x000F000C,
+        'PRINTER_ENUM_LOCAL': 0x00000002,
+        'PRINTER_ENUM_CONNECTIONS': 0x00000004,
+        'PRINTER_CONTROL_PURGE': 3,
+        'PRINTER_ATTRIBUTE_WORK_OFFLINE': 0x00000400,
+        'PRINTER_STATUS_PAUSED': 0x00000001,
+        'PRINTER_STATUS_ERROR': 0x00000002,
+        'PRINTER_STATUS_PAPER_JAM': 0x00000008,
+        'PRINTER_STATUS_PAPER_OUT': 0x00000010,
+        'PRINTER_STATUS_PAPER_PROBLEM': 0x00000040,
+        'PRINTER_STATUS_OFFLINE': 0x00000080,
+        'PRINTER_STATUS_NOT_AVAILABLE': 0x00001000,
+        'PRINTER_STATUS_USER_INTERVENTION': 0x00100000,
+        'PRINTER_STATUS_DOOR_OPEN': 0x00400000,
+        'JOB_STATUS_PAUSED': 0x00000001,
+        'JOB_STATUS_ERROR': 0x00000002,
+        'JOB_STATUS_DELETING': 0x00000004,
+        'JOB_STATUS_SPOOLING': 0x00000008,
+        'JOB_STATUS_PRINTING': 0x00000010,
+        'JOB_STATUS_OFFLINE': 0x00000020,
+        'JOB_STATUS_PAPEROUT': 0x00000040,
+        'JOB_STATUS_PRINTED': 0x00000080,
+        'JOB_STATUS_DELETED': 0x00000100,
+        'JOB_STATUS_BLOCKED_DEVQ': 0x00000200,
+        'JOB_STATUS_USER_INTERVENTION': 0x00000400,
+        'JOB_CONTROL_PAUSE': 1,
+        'JOB_CONTROL_RESUME': 2,
+        'JOB_CONTROL_CANCEL': 3,
+        'JOB_CONTROL_DELETE': 5,
+    }
+
+    def __init__(self, printers, seed=0):
+        self.rng = random.Random(seed)
+        self.printers = {
+            name: {'status': 0, 'attributes': 0, 'jobs': []}
+            for name in printers
+        }
+        self.handles = {}
+        self.next_handle = 1
+        self.next_job_id = 1
+        self.calls = 0
+        # The app calls the spooler from the Tk thread and background pollers at once
+        self.lock = threading.RLock()
+
+    def module(self):
+        """Build a module object that can be installed as win32print"""
+        module = types.ModuleType('win32print')
+        module.__dict__.update(self.CONSTANTS)
+        for name in ('OpenPrinter', 'ClosePrinter', 'EnumJobs', 'GetPrinter', 'SetJob',
+                     'SetPrinter', 'EnumPrinters', 'ReadPrinter', 'StartDocPrinter',
+                     'WritePrinter', 'EndDocPrinter'):
+            setattr(module, name, self._locked(getattr(self, name)))
+        return module
+
+    def _locked(self, func):
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            with self.lock:
+                return func(*args, **kwargs)
+        return call
+
+    @property
+    def open_handles(self):
+        return len(self.handles)
+
+    def tick(self, arrival_rate=0.3, print_rate=0.5, fault_rate=0.02):
+        """Advance the simulated world: jobs arrive, print and printers fail or recover"""
+        with self.lock:
+            self._tick(arrival_rate, print_rate, fault_rate)
+
+    def _tick(self, arrival_rate, print_rate, fault_rate):
+        c = self.CONSTANTS
+        for name, printer in self.printers.items():
+            if self.rng.random() < arrival_rate:
+                printer['jobs'].append({'JobId': self.next_job_id, 'Status': 0,
+                                        'pDocument': f"Receipt {self.next_job_id}",
+                                        'pDatatype': 'RAW', 'data': b'\x1b@receipt\n' * 8})
+                self.next_job_id += 1
+            if not printer['status'] and printer['jobs'] and self.rng.random() < print_rate:
+                printer['jobs'].pop(0)
+            if self.rng.random() < fault_rate:
+                printer['status'] = 0 if printer['status'] else self.rng.choice(
+                    (c['PRINTER_STATUS_OFFLINE'], c['PRINTER_STATUS_PAPER_JAM']))
+
+    def _printer(self, handle):
+        if handle not in self.handles:
+            raise SpoolerError("The handle is invalid.")
+        name, job_id = self.handles[handle]
+        return name, self.printers[name], job_id
+
+    def OpenPrinter(self, name, defaults=None):
+        self.calls += 1
+        printer_name, _, job = name.partition(',Job ')
+        if printer_name not in self.printers:
+            raise SpoolerError("The printer name is invalid.")
+        handle = self.next_handle
+        self.next_handle += 1
+        self.handles[handle] = (printer_name, int(job) if job else None)
+        return handle
+
+    def ClosePrinter(self, handle):
+        self.calls += 1
+        if self.handles.pop(handle, None) is None:
+            raise SpoolerError("The handle is invalid.")
+
+    def EnumJobs(self, handle, first, count, level):
+        self.calls += 1
+        _, printer, _ = self._printer(handle)
+        return [{k: v for k, v in job.items() if k != 'data'} for job in printer['jobs']]
+
+    def GetPrinter(self, handle, level):
+        self.calls += 1
+        name, printer, _ = self._printer(handle)
+        return {'pPrinterName': name, 'pDriverName': 'Generic / Text Only',
+                'Status': printer['status'], 'Attributes': printer['attributes'],
+                'cJobs': len(printer['jobs'])}
+
+    def SetJob(self, handle, job_id, level, info, command):
+        self.calls += 1
+        _, printer, _ = self._printer(handle)
+        job = next((j for j in printer['jobs'] if j['JobId'] == job_id), None)
+        if job is None:
+            raise SpoolerError("The parameter is incorrect.")
+        if command in (self.CONSTANTS['JOB_CONTROL_DELETE'], self.CONSTANTS['JOB_CONTROL_CANCEL']):
+            printer['jobs'].remove(job)
+        elif command == self.CONSTANTS['JOB_CONTROL_PAUSE']:
+            job['Status'] |= self.CONSTANTS['JOB_STATUS_PAUSED']
+        elif command == self.CONSTANTS['JOB_CONTROL_RESUME']:
+            job['Status'] &= ~self.CONSTANTS['JOB_STATUS_PAUSED']
+
+    def SetPrinter(self, handle, level, info, command):
+        self.calls += 1
+        _, printer, _ = self._printer(handle)
+        if command == self.CONSTANTS['PRINTER_CONTROL_PURGE']:
+            printer['jobs'].clear()
+
+    def EnumPrinters(self, flags, name=None, level=1):
+        self.calls += 1
+        return [(0, f"{n},Generic / Text Only,", n, '') for n in self.printers]
+
+    def ReadPrinter(self, handle, size):
+        self.calls += 1
+        _, printer, job_id = self._printer(handle)
+        job = next((j for j in printer['jobs'] if j['JobId'] == job_id), None)
+        if job is None:
+            raise SpoolerError("The parameter is incorrect.")
+        data, job['data'] = job['data'][:size], job['data'][size:]
+        return data
+
+    def StartDocPrinter(self, handle, level, doc_info):
+        self.calls += 1
+        _, printer, _ = self._printer(handle)
+        printer.setdefault('writing', {})[handle] = {
+            'JobId': self.next_job_id, 'Status': 0, 'pDocument': doc_info[0],
+            'pDatatype': doc_info[2], 'data': b''}
+        self.next_job_id += 1
+
+    def WritePrinter(self, handle, data):
+        self.calls += 1
+        _, printer, _ = self._printer(handle)
+        printer['writing'][handle]['data'] += data
+        return len(data)
+
+    def EndDocPrinter(self, handle):
+        self.calls += 1
+        _, printer, _ = self._printer(handle)
+        printer['jobs'].append(printer['writing'].pop(handle))
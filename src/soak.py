@@ -0,0 +1,252 @@
+"""
+Soak test harness for PQManager
+
+Drives the Application / TrayManager / PrinterManager lifecycle at accelerated
+speed against a simulated print spooler and system tray, sampling tracemalloc
+and handle counts along the way. Exits non-zero on sustained growth.
+
+Usage:
+    python -m src.soak --iterations 5000 --sample-every 100
+
+A Tk display is still required; the spooler and tray are simulated.
+"""
+
+import argparse
+import gc
+import importlib
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import tracemalloc
+import types
+import weakref
+
+# Make the project importable when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src import diagnostics
+from src.simulated_spooler import SimulatedSpooler
+
+
+class SimulatedTray:
+    """Stand-in for pystray that keeps a detached thread per icon like the real backend"""
+
+    def __init__(self):
+        self.live_icons = weakref.WeakSet()
+        self.created = 0
+
+    def module(self):
+        """Build a module object that can be installed as pystray"""
+        tray = self
+
+        class MenuItem:
+            def __init__(self, text, action, default=False, **kwargs):
+                self.text = text
+                self.action = action
+                self.default = default
+
+        class Icon:
+            def __init__(self, name, icon=None, title=None, menu=None):
+                self.name = name
+                self.icon = icon
+                self.title = title
+                self.menu = menu
+                self.visible = False
+                self._stopped = threading.Event()
+                self._thread = None
+                tray.live_icons.add(self)
+                tray.created += 1
+
+            def run_detached(self):
+                self.visible = True
+                self._thread = threading.Thread(target=self._stopped.wait, name="pystray", daemon=True)
+                self._thread.start()
+
+            def stop(self):
+                self.visible = False
+                self._stopped.set()
+                if self._thread:
+                    self._thread.join(timeout=1)
+
+        module = types.ModuleType('pystray')
+        module.Icon = Icon
+        module.MenuItem = MenuItem
+        module.Menu = tuple
+        return module
+
+
+def install_simulated_backends(spooler, tray):
+    """Install simulated spooler/tray modules, plus inert win32 stubs where pywin32 is missing"""
+    sys.modules['win32print'] = spooler.module()
+    sys.modules['pystray'] = tray.module()
+
+    for name in ('win32api', 'win32con', 'win32event', 'win32gui', 'winerror'):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            stub = types.ModuleType(name)
+            stub.GetLastError = lambda: 0
+            stub.CreateMutex = lambda *args: None
+            stub.ERROR_ALREADY_EXISTS = 183
+            sys.modules[name] = stub
+
+
+def detect_growth(values, threshold):
+    """Report sustained growth: quarter medians rise monotonically by more than threshold"""
+    if len(values) < 8:
+        return False
+    quarter = len(values) // 4
+    medians = [statistics.median(values[i * quarter:(i + 1) * quarter]) for i in range(4)]
+    rising = all(a < b for a, b in zip(medians, medians[1:]))
+    return rising and medians[-1] - medians[0] > threshold
+
+
+class SoakTest:
+    """Cycle the application through minimize/restore and monitoring passes"""
+
+    def __init__(self, iterations, sample_every, warmup, max_growth_kb, seed=0):
+        self.iterations = iterations
+        self.sample_every = sample_every
+        self.warmup = warmup
+        self.max_growth = max_growth_kb * 1024
+        self.printers = ["Receipt Printer", "Kitchen Printer 1", "Kitchen Printer 2"]
+        self.spooler = SimulatedSpooler(self.printers, seed=seed)
+        self.tray = SimulatedTray()
+        self.samples = []
+
+    def _create_app(self, work_dir):
+        install_simulated_backends(self.spooler, self.tray)
+        from src.config_manager import ConfigManager
+        from src.main import Application
+        from src.tray_manager import STATUS_PENDING
+        self.tray_status = STATUS_PENDING
+
+        config_manager = ConfigManager(config_dir=os.path.join(work_dir, 'config'))
+        config_manager.save_settings({
+            'selected_printer': self.printers[0],
+            'auto_start_monitoring': True,
+            'printer_pools': {'kitchen': self.printers[1:]},
+        })
+        # Poll on every pump of the Tk loop; set before auto-start schedules the first pass
+        return Application(config_manager=config_manager, monitor_interval=1)
+
+    def _pump(self, app):
+        app.root.update_idletasks()
+        app.root.update()
+
+    def _sample(self, iteration, app):
+        # Quiesce the status poller so an in-flight snapshot isn't counted as a leaked handle
+        app.status_poller.stop()
+        app.status_poller.join()
+        gc.collect()
+        traced, _ = tracemalloc.get_traced_memory()
+        self.samples.append({
+            'iteration': iteration,
+            'traced': traced,
+            'handles': diagnostics.count_open_handles(),
+            'spooler_handles': self.spooler.open_handles,
+            'threads': threading.active_count(),
+            'tray_icons': len(self.tray.live_icons),
+            'spooler_calls': self.spooler.calls,
+        })
+        app.status_poller.start()
+
+    def run(self):
+        """Run the soak test and return True if no leaks were detected"""
+        work_dir = tempfile.mkdtemp(prefix="pqmanager_soak_")
+        os.chdir(work_dir)
+        tracemalloc.start(10)
+
+        app = self._create_app(work_dir)
+        baseline = None
+        try:
+            for iteration in range(1, self.iterations + 1):
+                self.spooler.tick()
+
+                # Minimize to tray, let the monitor fire, then restore from the tray menu
+                app.tray_manager.minimize_to_tray()
+                self._pump(app)
+                app.tray_manager._show_window(app.tray_manager.tray_icon, None)
+                self._pump(app)
+                app.tray_manager.update_status(self.tray_status, iteration % 15)
+
+                if iteration == self.warmup:
+                    gc.collect()
+                    baseline = tracemalloc.take_snapshot()
+                if iteration > self.warmup and iteration % self.sample_every == 0:
+                    self._sample(iteration, app)
+        finally:
+            app.cleanup()
+            app.tray_manager.cleanup()
+            app.root.destroy()
+
+        return self._report(baseline, work_dir)
+
+    def _report(self, baseline, work_dir):
+        failures = []
+        checks = {
+            'traced': self.max_growth,
+            'handles': 0,
+            'spooler_handles': 0,
+            'threads': 0,
+            'tray_icons': 0,
+        }
+        for key, threshold in checks.items():
+            values = [s[key] for s in self.samples if s[key] is not None]
+            if detect_growth(values, threshold):
+                failures.append(f"{key} grew from {values[0]} to {values[-1]}")
+        if any(s['spooler_handles'] for s in self.samples):
+            failures.append("spooler handles left open between polls")
+
+        # Every iteration should run at least one monitoring pass against the spooler
+        for previous, current in zip(self.samples, self.samples[1:]):
+            if current['spooler_calls'] - previous['spooler_calls'] < current['iteration'] - previous['iteration']:
+                failures.append(f"monitoring stalled: only {current['spooler_calls'] - previous['spooler_calls']} "
+                                f"spooler calls between iterations {previous['iteration']} and {current['iteration']}")
+                break
+
+        print(f"Soak test: {self.iterations} iterations, {len(self.samples)} samples, "
+              f"{self.tray.created} tray icons created, {self.spooler.calls} spooler calls")
+        print(f"Work directory: {work_dir}")
+        for s in self.samples[::max(1, len(self.samples) // 10)]:
+            print(f"  #{s['iteration']}: traced={s['traced'] / 1024:.1f} KiB handles={s['handles']} "
+                  f"spooler_handles={s['spooler_handles']} threads={s['threads']} "
+                  f"tray_icons={s['tray_icons']}")
+
+        if failures:
+            print("FAILED:")
+            for failure in failures:
+                print(f"  {failure}")
+            if baseline is not None:
+                print("Top allocation growth since warmup:")
+                for stat in tracemalloc.take_snapshot().compare_to(baseline, 'lineno')[:10]:
+                    print(f"  {stat}")
+            return False
+
+        print("PASSED: no sustained growth detected")
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PQManager soak test with leak detection")
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--sample-every', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=500)
+    parser.add_argument('--max-growth-kb', type=int, default=1024,
+                        help="Allowed traced memory growth after warmup")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Keep harness flags away from Application's own argv checks
+    sys.argv = sys.argv[:1]
+
+    soak = SoakTest(args.iterations, args.sample_every, args.warmup, args.max_growth_kb, args.seed)
+    sys.exit(0 if soak.run() else 1)
+
+
+if __name__ == "__main__":
+    main()
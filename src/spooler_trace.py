@@ -0,0 +1,447 @@
+"""
+Spooler trace recording and replay
+
+TraceRecorder wraps win32print and appends every EnumJobs / GetPrinter result
+and every SetJob / SetPrinter action PrinterManager takes to a gzip'd JSON-lines
+trace. It also samples the monitored printers on its own fine cadence, so job
+arrival and completion times don't depend on how often the app happens to poll.
+TraceReplay feeds a recorded trace back through PrinterManager's monitoring pass
+on a virtual clock, so different clear thresholds and poll intervals can be
+compared deterministically on any OS.
+
+Usage:
+    python -m src.spooler_trace trace.jsonl.gz --threshold 1 2 --interval 10 60 300
+"""
+
+import argparse
+import bisect
+import gzip
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import zlib
+
+# Make the project importable when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.printer_manager import PrinterManager
+from src.simulated_spooler import SimulatedSpooler
+
+FLUSH_EVERY = 100  # Events between flushes so a crash loses little of the trace
+SAMPLE_INTERVAL = 5.0  # Seconds between the recorder's own queue/status samples
+
+# Job commands that remove a job (win32print JOB_CONTROL_CANCEL / JOB_CONTROL_DELETE)
+JOB_REMOVING_COMMANDS = (
+    SimulatedSpooler.CONSTANTS['JOB_CONTROL_CANCEL'],
+    SimulatedSpooler.CONSTANTS['JOB_CONTROL_DELETE'],
+)
+
+
+class TraceRecorder:
+    """Pass-through win32print wrapper that records spooler observations and actions"""
+
+    def __init__(self, spooler, trace_file, clock=time):
+        self._spooler = spooler
+        self._clock = clock
+        self._start = clock.time()
+        self._handles = {}  # id(handle) -> printer name
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stop_event = threading.Event()
+        self._sampler = None
+        self.printers = []  # Printers sampled by the recorder, replaced wholesale
+        self.trace_file = trace_file
+        os.makedirs(os.path.dirname(trace_file) or '.', exist_ok=True)
+        self._file = gzip.open(trace_file, 'at', encoding='utf-8')
+        self._write({'op': 'start', 'wall': round(self._start, 3)})
+        logging.info(f"Recording spooler trace to {trace_file}")
+
+    def __getattr__(self, name):
+        # Constants and calls that don't affect queue state go straight through
+        return getattr(self._spooler, name)
+
+    def _write(self, event):
+        event['t'] = round(self._clock.time() - self._start, 3)
+        line = json.dumps(event, separators=(',', ':'))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + '\n')
+            self._pending += 1
+            if self._pending >= FLUSH_EVERY:
+                self._file.flush()
+                self._pending = 0
+
+    def _record(self, op, handle, call, summarize=None, **fields):
+        event = {'op': op, 'p': self._handles.get(id(handle))}
+        event.update(fields)
+        try:
+            result = call()
+        except Exception as e:
+            event['e'] = str(e)
+            self._write(event)
+            raise
+        if summarize:
+            event['r'] = summarize(result)
+        self._write(event)
+        return result
+
+    def OpenPrinter(self, name, *args):
+        handle = self._spooler.OpenPrinter(name, *args)
+        self._handles[id(handle)] = name
+        return handle
+
+    def ClosePrinter(self, handle):
+        self._handles.pop(id(handle), None)
+        return self._spooler.ClosePrinter(handle)
+
+    def EnumJobs(self, handle, *args):
+        return self._record('EnumJobs', handle, lambda: self._spooler.EnumJobs(handle, *args),
+                            lambda jobs: [[j['JobId'], j['Status'], j.get('pDatatype')] for j in jobs])
+
+    def GetPrinter(self, handle, level, *args):
+        return self._record('GetPrinter', handle, lambda: self._spooler.GetPrinter(handle, level, *args),
+                            lambda info: [info['Status'], info['Attributes'], info['pDriverName']]
+                            if level == 2 else None)
+
+    def SetJob(self, handle, job_id, level, info, command):
+        return self._record('SetJob', handle,
+                            lambda: self._spooler.SetJob(handle, job_id, level, info, command),
+                            j=job_id, c=command)
+
+    def SetPrinter(self, handle, level, info, command):
+        return self._record('SetPrinter', handle,
+                            lambda: self._spooler.SetPrinter(handle, level, info, command), c=command)
+
+    def set_printers(self, printers):
+        """Set the printers the recorder samples"""
+        self.printers = list(printers)
+
+    def start_sampling(self, interval=SAMPLE_INTERVAL):
+        """Sample queue contents and status of every set printer every interval seconds"""
+        if self._sampler:
+            return
+        self._write({'op': 'sampling', 'interval': interval})
+        self._sampler = threading.Thread(target=self._sample_loop, args=(interval,),
+                                         name="TraceSampler", daemon=True)
+        self._sampler.start()
+
+    def _sample_loop(self, interval):
+        while not self._stop_event.wait(interval):
+            for name in self.printers:
+                try:
+                    handle = self.OpenPrinter(name)
+                    try:
+                        self.GetPrinter(handle, 2)
+                        self.EnumJobs(handle, 0, -1, 1)
+                    finally:
+                        self.ClosePrinter(handle)
+                except Exception as e:
+                    logging.error(f"Trace sampling failed for {name}: {e}")
+
+    def close(self):
+        """Stop sampling, then flush and close the trace file"""
+        self._stop_event.set()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def load_trace(trace_file):
+    """Load the events of a recorded trace
+
+    A trace cut off by a crash or kill has no gzip end-of-stream marker; every
+    event up to the last flush is still recovered.
+    """
+    with open(trace_file, 'rb') as f:
+        data = f.read()
+
+    # Decompress member by member (each app run appends one) and keep partial output
+    text = b''
+    truncated = False
+    while data:
+        decompressor = zlib.decompressobj(wbits=31)
+        try:
+            text += decompressor.decompress(data)
+        except zlib.error:
+            truncated = True
+            break
+        if not decompressor.eof:
+            truncated = True
+            break
+        data = decompressor.unused_data
+
+    events = []
+    for line in text.decode('utf-8', errors='replace').splitlines():
+        if not line.strip():
+            continue
+        try:
+            events.append(json.loads(line))
+        except json.JSONDecodeError:
+            # Only the last, partially flushed line can be cut short
+            truncated = True
+            break
+
+    if truncated:
+        logging.warning(f"Trace {trace_file} is truncated, recovered {len(events)} events")
+    return events
+
+
+class VirtualClock:
+    """time-module stand-in whose sleep() advances instantly"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ReplayConfig:
+    """Minimal ConfigManager stand-in for replays"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or {}
+
+    def get_setting(self, key, default=None):
+        return self.settings.get(key, default)
+
+
+class RecordedPrinter:
+    """Timeline of one printer rebuilt from a trace"""
+
+    def __init__(self):
+        # JobId -> {'first': t, 'last': t, 'datatype': str, 'statuses': [(t, status)], 'deleted': bool}
+        self.jobs = {}
+        self.states = []  # (t, status, attributes, driver)
+        self.observations = []  # Times the queue contents were observed
+        self.last_observed = []  # JobIds in the most recent observation
+
+    def jobs_at(self, t):
+        return [job_id for job_id, job in self.jobs.items() if job['first'] <= t <= job['last']]
+
+    def job_status_at(self, job_id, t):
+        statuses = self.jobs[job_id]['statuses']
+        index = bisect.bisect_right(statuses, (t, float('inf'))) - 1
+        return statuses[max(index, 0)][1]
+
+    def state_at(self, t):
+        index = bisect.bisect_right(self.states, (t, float('inf'))) - 1
+        if index < 0:
+            return 0, 0, ''
+        return self.states[index][1:]
+
+
+def build_timelines(events):
+    """Rebuild per-printer job lifetimes and status history from trace events"""
+    printers = {}
+    for event in events:
+        name = event.get('p')
+        if not name or 'e' in event or ',Job ' in name:
+            continue
+        printer = printers.setdefault(name, RecordedPrinter())
+        t = event['t']
+        if event['op'] == 'EnumJobs':
+            printer.observations.append(t)
+            printer.last_observed = [job_id for job_id, _, _ in event['r']]
+            for job_id, status, datatype in event['r']:
+                job = printer.jobs.setdefault(job_id, {'first': t, 'last': t, 'datatype': datatype,
+                                                       'statuses': [], 'deleted': False})
+                job['last'] = t
+                if not job['statuses'] or job['statuses'][-1][1] != status:
+                    job['statuses'].append((t, status))
+        elif event['op'] == 'GetPrinter' and event.get('r'):
+            printer.states.append((t, *event['r']))
+        elif event['op'] == 'SetJob' and event['j'] in printer.jobs and event['c'] in JOB_REMOVING_COMMANDS:
+            # Pause/resume (e.g. around a failover transfer) leave the job queued
+            printer.jobs[event['j']]['deleted'] = True
+        elif event['op'] == 'SetPrinter' and event['c'] == SimulatedSpooler.CONSTANTS['PRINTER_CONTROL_PURGE']:
+            # A purge follows the EnumJobs that found the jobs, so it removes what that saw
+            for job_id in printer.last_observed:
+                printer.jobs[job_id]['deleted'] = True
+    return printers
+
+
+class ReplaySpooler(SimulatedSpooler):
+    """Simulated spooler that reports recorded printer status and driver"""
+
+    def GetPrinter(self, handle, level):
+        info = super().GetPrinter(handle, level)
+        name = info['pPrinterName']
+        info['pDriverName'] = self.printers[name].get('driver') or info['pDriverName']
+        return info
+
+
+class TraceReplay:
+    """Replay a recorded trace through PrinterManager.service_queue with a given policy
+
+    Each poll the simulated spooler is synced to the recorded queue contents at
+    the current virtual time, minus jobs the replayed policy already removed.
+    A job counts as stuck once it has been queued for stuck_after seconds.
+
+    Job lifetimes are only as precise as the trace's sampling period; replaying
+    a poll interval shorter than that compares policies on interpolated data.
+    """
+
+    def __init__(self, events, stuck_after=120.0, pools=None):
+        self.events = events
+        self.stuck_after = stuck_after
+        self.pools = pools or {}
+        self.printers = build_timelines(events)
+        times = [event['t'] for event in events]
+        self.start = min(times) if times else 0.0
+        self.end = max(times) if times else 0.0
+        self.sample_period = self._sample_period()
+
+    def _sample_period(self):
+        """Seconds between queue observations: the recorder's cadence, or the median observed gap"""
+        for event in self.events:
+            if event['op'] == 'sampling':
+                return event['interval']
+        gaps = [b - a for printer in self.printers.values()
+                for a, b in zip(printer.observations, printer.observations[1:]) if b > a]
+        return statistics.median(gaps) if gaps else 0.0
+
+    def _sync(self, spooler, t, removed):
+        for name, recorded in self.printers.items():
+            status, attributes, driver = recorded.state_at(t)
+            spooler.printers[name].update(status=status, attributes=attributes, driver=driver)
+            spooler.printers[name]['jobs'] = [
+                {'JobId': job_id, 'Status': recorded.job_status_at(job_id, t), 'pDocument': f"Job {job_id}",
+                 'pDatatype': recorded.jobs[job_id]['datatype'] or 'RAW', 'data': b''}
+                for job_id in recorded.jobs_at(t) if (name, job_id) not in removed
+            ]
+
+    def run(self, clear_threshold=1, interval=300.0, speed=None):
+        """Replay the trace and return policy metrics
+
+        speed paces the replay against wall time (1000 = 1000x real time);
+        None replays as fast as possible. Results don't depend on speed.
+        """
+        spooler = ReplaySpooler(list(self.printers))
+        clock = VirtualClock(self.start)
+        previous_level = logging.getLogger().level
+        logging.getLogger().setLevel(logging.CRITICAL)
+        try:
+            manager = PrinterManager(ReplayConfig({'printer_pools': self.pools}),
+                                     spooler=spooler.module(), clock=clock)
+            removed = {}  # (printer, job_id) -> (t, action)
+            polls = 0
+            wall_start = time.monotonic()
+
+            while clock.now <= self.end:
+                poll_start = clock.now
+                self._sync(spooler, poll_start, removed)
+                for name in self.printers:
+                    before = {job['JobId'] for job in spooler.printers[name]['jobs']}
+                    action = manager.service_queue(name, clear_threshold=clear_threshold)
+                    after = {job['JobId'] for job in spooler.printers[name]['jobs']}
+                    for job_id in before - after:
+                        removed[(name, job_id)] = (clock.now, action or 'cleared')
+                polls += 1
+
+                clock.sleep(interval)
+                if speed:
+                    lag = (clock.now - self.start) / speed - (time.monotonic() - wall_start)
+                    if lag > 0:
+                        time.sleep(lag)
+        finally:
+            logging.getLogger().setLevel(previous_level)
+
+        return self._metrics(removed, polls, spooler.calls, clear_threshold, interval)
+
+    def _metrics(self, removed, polls, calls, clear_threshold, interval):
+        latencies = []
+        false_clears = 0
+        ambiguous = 0
+        missed = 0
+        stuck_jobs = 0
+
+        for name, recorded in self.printers.items():
+            for job_id, job in recorded.jobs.items():
+                lifetime = job['last'] - job['first']
+                stuck = lifetime >= self.stuck_after
+                stuck_jobs += stuck
+                if (name, job_id) not in removed:
+                    missed += stuck
+                    continue
+                removed_at, action = removed[(name, job_id)]
+                if stuck:
+                    latencies.append(max(0.0, removed_at - (job['first'] + self.stuck_after)))
+                elif action == 'cleared':
+                    # A job removed early by the recorded policy has no known natural end
+                    if job['deleted']:
+                        ambiguous += 1
+                    else:
+                        false_clears += 1
+
+        latencies.sort()
+        return {
+            'threshold': clear_threshold,
+            'interval': interval,
+            'undersampled': interval < self.sample_period,
+            'polls': polls,
+            'spooler_calls': calls,
+            'stuck_jobs': stuck_jobs,
+            'missed_stuck_jobs': missed,
+            'false_clears': false_clears,
+            'ambiguous_clears': ambiguous,
+            'latency_mean': statistics.mean(latencies) if latencies else None,
+            'latency_p95': latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+            'latency_max': latencies[-1] if latencies else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a spooler trace against monitoring policies")
+    parser.add_argument('trace', help="Trace file recorded with --record-trace")
+    parser.add_argument('--threshold', type=int, nargs='+', default=[1],
+                        help="Clear when the queue holds more than this many jobs")
+    parser.add_argument('--interval', type=float, nargs='+', default=[300.0],
+                        help="Seconds between monitoring passes")
+    parser.add_argument('--stuck-after', type=float, default=120.0,
+                        help="Seconds a job must sit in the queue to count as stuck")
+    parser.add_argument('--speed', type=float, default=1000.0,
+                        help="Replay speed relative to real time; 0 for unthrottled")
+    parser.add_argument('--pools', default='{}', help="printer_pools setting as JSON")
+    args = parser.parse_args()
+
+    replay = TraceReplay(load_trace(args.trace), stuck_after=args.stuck_after,
+                         pools=json.loads(args.pools))
+    print(f"Trace: {len(replay.events)} events, {len(replay.printers)} printers, "
+          f"{replay.end - replay.start:.0f}s, sampled every {replay.sample_period:.0f}s")
+    short_intervals = [i for i in args.interval if i < replay.sample_period]
+    if short_intervals:
+        print(f"WARNING: intervals {short_intervals} are shorter than the trace's sampling period; "
+              f"their results are based on interpolated job timings (marked *)", file=sys.stderr)
+    print(f"{'threshold':>9} {'interval':>9} {'polls':>6} {'calls':>7} {'stuck':>6} {'missed':>6} "
+          f"{'false':>6} {'ambig':>6} {'lat_mean':>9} {'lat_p95':>9} {'lat_max':>9}")
+
+    def fmt(value):
+        return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+
+    for threshold in args.threshold:
+        for interval in args.interval:
+            m = replay.run(threshold, interval, speed=args.speed or None)
+            interval_label = f"{m['interval']:.0f}{'*' if m['undersampled'] else ''}"
+            print(f"{m['threshold']:>9} {interval_label:>9} {m['polls']:>6} {m['spooler_calls']:>7} "
+                  f"{m['stuck_jobs']:>6} {m['missed_stuck_jobs']:>6} {m['false_clears']:>6} "
+                  f"{m['ambiguous_clears']:>6} {fmt(m['latency_mean'])} {fmt(m['latency_p95'])} "
+                  f"{fmt(m['latency_max'])}")
+
+
+if __name__ == "__main__":
+    main()
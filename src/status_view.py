@@ -0,0 +1,223 @@
+import concurrent.futures
+import logging
+import threading
+import time
+from tkinter import ttk
+from src.printer_manager import get_shared_executor
+
+COLUMNS = (
+    ('depth', "Jobs", 50),
+    ('oldest', "Oldest", 70),
+    ('state', "State", 110),
+    ('last_action', "Last Action", 150),
+)
+MAX_FPS = 10  # Cap on table redraws per second
+IDLE_INTERVAL = 1000  # Slowest redraw check (ms) while nothing changes
+
+def format_age(seconds):
+    """Format a job age like 45s, 3m 05s or 2h 10m"""
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+def snapshot_values(snapshot):
+    """Convert a PrinterManager queue snapshot into table row values"""
+    return (
+        str(snapshot['depth']),
+        format_age(snapshot['oldest_age']),
+        snapshot['state'],
+        snapshot['last_action'] or "-",
+    )
+
+class PrinterStatusTable:
+    """Treeview of printer queue status that applies changes in batched, rate-capped redraws
+
+    Any thread may submit row values; the Tk thread applies only rows whose values
+    changed, at most MAX_FPS times per second. The redraw check backs off to
+    IDLE_INTERVAL while nothing changes and stops entirely while the window is
+    withdrawn to the tray, resuming when it is shown again.
+    """
+
+    def __init__(self, parent, root, max_fps=MAX_FPS):
+        self.root = root
+        self.frame_interval = int(1000 / max_fps)
+        self.frame = ttk.Frame(parent)
+
+        self.tree = ttk.Treeview(self.frame, columns=[c[0] for c in COLUMNS], height=6)
+        self.tree.heading('#0', text="Printer")
+        self.tree.column('#0', width=160, stretch=True)
+        for column, heading, width in COLUMNS:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, stretch=False, anchor='center')
+
+        scrollbar = ttk.Scrollbar(self.frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side='left', expand=True, fill='both')
+        scrollbar.pack(side='right', fill='y')
+
+        self._rows = {}  # printer -> values currently shown
+        self._pending = {}  # printer -> new values, or None to remove the row
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._interval = self.frame_interval
+        self._flush_id = self.root.after(self._interval, self._flush)
+        self.root.bind('<Map>', self._on_map, add='+')
+
+    def submit(self, printer, values):
+        """Queue new values for a printer row; safe to call from any thread"""
+        with self._lock:
+            self._pending[printer] = values
+
+    def set_printers(self, printers):
+        """Queue removal of rows for printers that are no longer monitored"""
+        with self._lock:
+            for printer in set(self._rows) | set(self._pending):
+                if printer not in printers:
+                    self._pending[printer] = None
+
+    def _on_map(self, event):
+        """Resume redraws when the window is shown again"""
+        if event.widget is self.root and self._flush_id is None and not self._stopped:
+            self._interval = self.frame_interval
+            self._flush_id = self.root.after(self._interval, self._flush)
+
+    def _flush(self):
+        """Apply pending row changes in one batch, then schedule the next frame"""
+        self._flush_id = None
+        if self.root.state() == 'withdrawn':
+            return  # Changes keep accumulating; <Map> resumes the loop
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        try:
+            for printer, values in pending.items():
+                current = self._rows.get(printer)
+                if values is None:
+                    if current is not None:
+                        self.tree.delete(printer)
+                        del self._rows[printer]
+                elif current is None:
+                    self.tree.insert('', 'end', iid=printer, text=printer, values=values)
+                    self._rows[printer] = values
+                elif values != current:
+                    self.tree.item(printer, values=values)
+                    self._rows[printer] = values
+        except Exception as e:
+            logging.error(f"Error updating status table: {e}")
+
+        # Redraw at the frame rate while rows change, back off while idle
+        if pending:
+            self._interval = self.frame_interval
+        else:
+            self._interval = min(self._interval * 2, IDLE_INTERVAL)
+        self._flush_id = self.root.after(self._interval, self._flush)
+
+    def stop(self):
+        """Stop the redraw loop"""
+        self._stopped = True
+        if self._flush_id:
+            self.root.after_cancel(self._flush_id)
+            self._flush_id = None
+
+class StatusPoller:
+    """Background thread that polls queue snapshots and submits only the rows that changed
+
+    Snapshots are fanned out over the shared PrinterManager executor, so a slow or
+    offline network printer only delays its own row; a printer whose previous
+    snapshot is still in flight is skipped until it returns.
+    """
+
+    def __init__(self, printer_manager, table, interval=5.0):
+        self.printer_manager = printer_manager
+        self.table = table
+        self.interval = interval
+        self.printers = []  # Replaced wholesale from the Tk thread
+        self.snapshots = {}  # printer -> latest queue snapshot, read from the Tk thread
+        self._last_values = {}
+        self._lock = threading.Lock()  # Guards _last_values against set_printers
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def set_printers(self, printers):
+        """Set the printers to poll and drop rows for the rest"""
+        with self._lock:
+            self.printers = list(printers)
+            # Forget dropped printers so their row is resent if they are re-added
+            for printer in set(self._last_values) - set(self.printers):
+                del self._last_values[printer]
+            for printer in set(self.snapshots) - set(self.printers):
+                del self.snapshots[printer]
+            self.table.set_printers(self.printers)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="StatusPoller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def join(self, timeout=None):
+        """Wait for a stopped poller and its in-flight snapshots to finish"""
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _submit_snapshot(self, printer, future):
+        """Send a finished snapshot to the table if its row changed"""
+        try:
+            snapshot = future.result()
+            values = snapshot_values(snapshot)
+        except Exception as e:
+            logging.error(f"Error polling status for {printer}: {e}")
+            return
+        with self._lock:
+            if printer not in self.printers:
+                return
+            self.snapshots[printer] = snapshot
+            if values != self._last_values.get(printer):
+                self._last_values[printer] = values
+                self.table.submit(printer, values)
+
+    def _run(self):
+        in_flight = {}  # printer -> future of its snapshot
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            # Futures cancelled by an executor shutdown never show up as done in wait()
+            for printer, future in list(in_flight.items()):
+                if future.cancelled():
+                    del in_flight[printer]
+            for printer in self.printers:
+                if printer not in in_flight:
+                    try:
+                        in_flight[printer] = get_shared_executor().submit(
+                            self.printer_manager.get_queue_snapshot, printer)
+                    except RuntimeError as e:
+                        # The shared executor was shut down; the next pass gets a fresh one
+                        logging.warning(f"Status poll skipped, executor unavailable: {e}")
+                        break
+
+            # Submit rows as their snapshots arrive, until the interval is up
+            deadline = started + self.interval
+            while in_flight and not self._stop_event.is_set():
+                done, _ = concurrent.futures.wait(
+                    list(in_flight.values()), timeout=max(0.0, deadline - time.monotonic()),
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                if not done:
+                    break
+                for printer, future in list(in_flight.items()):
+                    if future in done:
+                        del in_flight[printer]
+                        self._submit_snapshot(printer, future)
+
+            self._stop_event.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+        # Let outstanding spooler calls finish so callers can rely on a quiet spooler
+        concurrent.futures.wait([f for f in in_flight.values() if not f.cancelled()], timeout=self.interval)
@@ -14,16 +14,46 @@ Tested behaviors:
 
 import pystray
 from pystray import MenuItem as item
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFont
 import logging
 import sys
 import os
+import time
 from packaging import version
 
 __version__ = "1.0.0"  # Current working version
 MINIMUM_COMPATIBLE_VERSION = "1.0.0"  # Minimum version known to work
 
+# Queue states shown on the tray icon
+STATUS_IDLE = "idle"
+STATUS_PENDING = "pending"
+STATUS_STUCK = "stuck"
+STATUS_OFFLINE = "offline"
+
+STATUS_COLORS = {
+    STATUS_IDLE: (46, 160, 67),      # Green
+    STATUS_PENDING: (31, 111, 235),  # Blue
+    STATUS_STUCK: (230, 140, 0),     # Orange
+    STATUS_OFFLINE: (200, 30, 30),   # Red
+}
+
+STATUS_LABELS = {
+    STATUS_IDLE: "Idle",
+    STATUS_PENDING: "Jobs pending",
+    STATUS_STUCK: "Queue stuck",
+    STATUS_OFFLINE: "Printer offline",
+}
+
+ICON_SIZE = 64
+BADGE_RADIUS = ICON_SIZE // 3  # Large enough to stay legible when Windows scales the icon to 16px
+BADGE_FONTS = ("segoeuib.ttf", "arialbd.ttf", "arial.ttf", "DejaVuSans-Bold.ttf")
+MAX_BADGE_DEPTH = 9  # Deeper queues show as "9+"
+STATUS_UPDATE_INTERVAL = 2.0  # Minimum seconds between tray icon updates
+
 class TrayManager:
+    # Icon frames are rendered once per process and shared by every tray icon
+    _icon_cache = {}
+
     def __init__(self, root_window):
         current = version.parse(__version__)
         min_compatible = version.parse(MINIMUM_COMPATIBLE_VERSION)
@@ -37,6 +67,15 @@ class TrayManager:
         self.root = root_window
         self.tray_icon = None
         self.icon_path = self._get_icon_path()
+
+        # Live queue status shown on the icon
+        self.status = (STATUS_IDLE, 0)
+        self._pending_status = None
+        self._status_update_id = None
+        self._last_status_update = 0.0
+
+        # Extra (text, action, tk_thread) menu entries registered by the application
+        self.menu_items = []
         
         # Bind window events
         self.root.protocol("WM_DELETE_WINDOW", self.minimize_to_tray)
@@ -49,23 +88,138 @@ class TrayManager:
             base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         return os.path.join(base_path, "assets", "Logo.ico")
 
+    @staticmethod
+    def _badge_text(depth):
+        """Get the badge label for a queue depth"""
+        if depth <= 0:
+            return ""
+        return str(depth) if depth <= MAX_BADGE_DEPTH else f"{MAX_BADGE_DEPTH}+"
+
+    @staticmethod
+    def _badge_font(badge):
+        """Get a bold TrueType font sized to fill the badge"""
+        size = int(BADGE_RADIUS * (1.6 if len(badge) == 1 else 1.15))
+        for name in BADGE_FONTS:
+            try:
+                return ImageFont.truetype(name, size)
+            except OSError:
+                continue
+        return ImageFont.load_default(size)
+
+    def _render_icons(self):
+        """Render every status/badge icon variant once and cache it"""
+        cache = TrayManager._icon_cache
+        if cache:
+            return cache
+
+        base = Image.open(self.icon_path).convert("RGBA").resize((ICON_SIZE, ICON_SIZE))
+        badges = [self._badge_text(depth) for depth in range(MAX_BADGE_DEPTH + 2)]
+        fonts = {badge: self._badge_font(badge) for badge in badges if badge}
+
+        for state, color in STATUS_COLORS.items():
+            for badge in badges:
+                frame = base.copy()
+                draw = ImageDraw.Draw(frame)
+                # Status dot in the bottom-right corner, with the depth drawn inside it
+                radius = BADGE_RADIUS
+                box = (ICON_SIZE - 2 * radius, ICON_SIZE - 2 * radius, ICON_SIZE - 1, ICON_SIZE - 1)
+                draw.ellipse(box, fill=color + (255,), outline=(255, 255, 255, 255), width=2)
+                if badge:
+                    font = fonts[badge]
+                    left, top, right, bottom = draw.textbbox((0, 0), badge, font=font)
+                    x = box[0] + radius - (right - left) / 2 - left
+                    y = box[1] + radius - (bottom - top) / 2 - top
+                    draw.text((x, y), badge, font=font, fill=(255, 255, 255, 255))
+                cache[(state, badge)] = frame
+
+        logging.info(f"Rendered {len(cache)} tray icon variants")
+        return cache
+
+    def _status_icon(self):
+        """Get the cached icon for the current status"""
+        state, depth = self.status
+        return self._render_icons()[(state, self._badge_text(depth))]
+
+    def _status_title(self):
+        """Get the tooltip text for the current status"""
+        state, depth = self.status
+        title = f"PQ Manager v1.1 - {STATUS_LABELS[state]}"
+        if depth:
+            title += f" ({depth} job{'s' if depth != 1 else ''})"
+        return title
+
+    def update_status(self, state, depth):
+        """Queue a tray status update; rapid updates are coalesced and rate-limited"""
+        self._pending_status = (state, max(0, depth))
+        if self._status_update_id:
+            return  # An update is already scheduled and will pick up the latest status
+
+        delay = self._last_status_update + STATUS_UPDATE_INTERVAL - time.monotonic()
+        self._status_update_id = self.root.after(max(0, int(delay * 1000)), self._apply_status)
+
+    def _apply_status(self):
+        """Push the latest pending status to the tray icon"""
+        self._status_update_id = None
+        self._last_status_update = time.monotonic()
+        if self._pending_status is None:
+            return
+
+        previous_key = (self.status[0], self._badge_text(self.status[1]))
+        previous_title = self._status_title()
+        self.status, self._pending_status = self._pending_status, None
+
+        if not self.tray_icon:
+            return  # Picked up when the tray icon is next created
+
+        try:
+            if (self.status[0], self._badge_text(self.status[1])) != previous_key:
+                self.tray_icon.icon = self._status_icon()
+            title = self._status_title()
+            if title != previous_title:
+                self.tray_icon.title = title
+        except Exception as e:
+            logging.error(f"Error updating tray status: {e}")
+
+    def add_menu_item(self, text, action, tk_thread=True):
+        """Add a tray menu entry
+
+        The action runs on the Tk thread unless tk_thread is False, in which case it
+        runs straight on the tray thread and still works while the Tk loop is hung.
+        Such actions must be thread-safe.
+        """
+        self.menu_items.append((text, action, tk_thread))
+
+    def _menu_callback(self, action, tk_thread=True):
+        """Wrap an action so pystray invokes it on the Tk thread, or directly"""
+        def callback(icon, item):
+            if not tk_thread:
+                try:
+                    action()
+                except Exception as e:
+                    logging.error(f"Error running tray action: {e}")
+                return
+            self.root.after(0, action)
+        return callback
+
     def create_tray_icon(self):
         """Create and display the system tray icon"""
         if self.tray_icon:
             return
         
         try:
-            icon_image = Image.open(self.icon_path)
+            icon_image = self._status_icon()
             
             menu = (
                 item('Show', self._show_window, default=True),  # Make Show the default action
+                *(item(text, self._menu_callback(action, tk_thread))
+                  for text, action, tk_thread in self.menu_items),
                 item('Exit', self._exit_application)
             )
             
             self.tray_icon = pystray.Icon(
                 "PQManager",
                 icon_image,
-                "PQ Manager v1.1",
+                self._status_title(),
                 menu
             )
             
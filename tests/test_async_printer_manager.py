@@ -0,0 +1,135 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from src.async_printer_manager import AsyncPrinterManager
+from src.printer_manager import PrinterManager
+from src.simulated_spooler import SimulatedSpooler
+
+OFFLINE = SimulatedSpooler.CONSTANTS['PRINTER_STATUS_OFFLINE']
+
+
+class SlowSpooler(SimulatedSpooler):
+    """Simulated spooler whose "Slow" printer takes a while to list its jobs"""
+
+    delay = 0.3
+
+    def __init__(self, printers):
+        super().__init__(printers + ["Slow"])
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def EnumJobs(self, handle, first, count, level):
+        if self.handles[handle][0] == "Slow":
+            self.gate.wait(5)
+            time.sleep(self.delay)
+        return super().EnumJobs(handle, first, count, level)
+
+
+def add_jobs(spooler, printer, job_ids):
+    for job_id in job_ids:
+        spooler.printers[printer]['jobs'].append({
+            'JobId': job_id, 'Status': 0, 'pDocument': f"Receipt {job_id}",
+            'pDatatype': 'RAW', 'data': b''})
+
+
+@pytest.fixture
+def executor():
+    # A single worker makes every call after the first queue for it
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def make_facade(spooler, executor, **kwargs):
+    return AsyncPrinterManager(PrinterManager(None, spooler=spooler.module()), executor=executor, **kwargs)
+
+
+def test_timeout_starts_once_the_call_runs(executor):
+    spooler = SlowSpooler(["A"])
+    add_jobs(spooler, "A", [1, 2])
+    printers = make_facade(spooler, executor)
+
+    async def run():
+        slow = asyncio.ensure_future(printers.get_queue_length("Slow"))
+        # Queued behind the slow call for longer than its own timeout
+        assert await printers.get_queue_length("A", timeout=0.1) == 2
+        assert await slow == 0
+
+        with pytest.raises(asyncio.TimeoutError):
+            await printers.get_queue_length("Slow", timeout=0.05)
+
+    asyncio.run(run())
+
+
+def test_call_cancelled_while_queued_never_runs(executor):
+    spooler = SlowSpooler(["A"])
+    add_jobs(spooler, "A", [1, 2])
+    printers = make_facade(spooler, executor)
+
+    async def run():
+        spooler.gate.clear()
+        slow = asyncio.ensure_future(printers.get_queue_length("Slow"))
+        clear = asyncio.ensure_future(printers.clear_queue("A"))
+        await asyncio.sleep(0.05)
+        clear.cancel()
+        spooler.gate.set()
+        await slow
+        with pytest.raises(asyncio.CancelledError):
+            await clear
+
+    asyncio.run(run())
+    executor.shutdown(wait=True)
+    assert [job['JobId'] for job in spooler.printers["A"]['jobs']] == [1, 2]
+
+
+def test_batch_timeout_maps_unfinished_checks_to_none(executor):
+    spooler = SlowSpooler(["A", "B"])
+    add_jobs(spooler, "A", [1])
+    printers = make_facade(spooler, executor)
+
+    lengths = asyncio.run(printers.get_queue_lengths(["A", "Slow", "B"], batch_timeout=0.15))
+
+    # B never got the worker before the batch ran out of time
+    assert lengths == {"A": 1, "Slow": None, "B": None}
+
+
+def test_facade_is_reusable_across_event_loops(executor):
+    spooler = SlowSpooler(["A", "B"])
+    add_jobs(spooler, "B", [1, 2, 3])
+    # max_pending=1 makes every call contend for the in-flight semaphore
+    printers = make_facade(spooler, executor, max_pending=1)
+
+    for _ in range(2):
+        assert asyncio.run(printers.get_queue_lengths(["A", "B"])) == {"A": 0, "B": 3}
+
+
+def test_watch_queues_yields_only_depth_and_state_changes(executor):
+    spooler = SlowSpooler(["A", "B"])
+    printers = make_facade(spooler, executor)
+
+    async def run():
+        watch = printers.watch_queues(["A", "B"], interval=0.01)
+        first = [await watch.__anext__(), await watch.__anext__()]
+        assert [(e['printer'], e['previous'], e['current']['depth']) for e in first] == [
+            ("A", None, 0), ("B", None, 0)]
+
+        add_jobs(spooler, "A", [1])
+        event = await watch.__anext__()
+        assert (event['printer'], event['previous']['depth'], event['current']['depth']) == ("A", 0, 1)
+
+        spooler.printers["B"]['status'] = OFFLINE
+        event = await watch.__anext__()
+        assert (event['printer'], event['previous']['state'], event['current']['state']) == (
+            "B", "Ready", "Offline")
+
+        # Polls keep running, but nothing changed so nothing is yielded
+        calls = spooler.calls
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(watch.__anext__(), 0.2)
+        assert spooler.calls > calls
+
+    asyncio.run(run())
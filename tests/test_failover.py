@@ -0,0 +1,174 @@
+from src.printer_manager import PrinterManager
+from src.simulated_spooler import SimulatedSpooler
+
+OFFLINE = SimulatedSpooler.CONSTANTS['PRINTER_STATUS_OFFLINE']
+PAPER_JAM = SimulatedSpooler.CONSTANTS['PRINTER_STATUS_PAPER_JAM']
+SPOOLING = SimulatedSpooler.CONSTANTS['JOB_STATUS_SPOOLING']
+PAUSED = SimulatedSpooler.CONSTANTS['JOB_STATUS_PAUSED']
+
+
+class PoolConfig:
+    def __init__(self, pools):
+        self.pools = pools
+
+    def get_setting(self, key, default=None):
+        return {'printer_pools': self.pools}.get(key, default)
+
+
+def make_manager(spooler, pools):
+    return PrinterManager(PoolConfig(pools), spooler=spooler.module())
+
+
+def add_jobs(spooler, printer, job_ids, status=0):
+    for job_id in job_ids:
+        spooler.printers[printer]['jobs'].append({
+            'JobId': job_id, 'Status': status, 'pDocument': f"Receipt {job_id}",
+            'pDatatype': 'RAW', 'data': f"receipt {job_id}".encode()})
+
+
+def job_ids(spooler, printer):
+    return [job['JobId'] for job in spooler.printers[printer]['jobs']]
+
+
+def documents(spooler, printer):
+    return [job['pDocument'] for job in spooler.printers[printer]['jobs']]
+
+
+def test_failover_balances_jobs_by_queue_depth():
+    spooler = SimulatedSpooler(["A", "B", "C"])
+    manager = make_manager(spooler, {'kitchen': ["A", "B", "C"]})
+    spooler.printers["A"]['status'] = OFFLINE
+    add_jobs(spooler, "A", [1, 2, 3])
+    add_jobs(spooler, "B", [10, 11])
+
+    assert manager.service_queue("A") == 'failover'
+
+    # C starts empty so it takes jobs until it ties with B, then B takes the next
+    assert job_ids(spooler, "A") == []
+    assert documents(spooler, "C") == ["Receipt 1", "Receipt 2"]
+    assert documents(spooler, "B") == ["Receipt 10", "Receipt 11", "Receipt 3"]
+    assert spooler.open_handles == 0
+
+
+def test_failover_leaves_spooling_jobs_for_next_pass():
+    spooler = SimulatedSpooler(["A", "B"])
+    manager = make_manager(spooler, {'kitchen': ["A", "B"]})
+    spooler.printers["A"]['status'] = OFFLINE
+    add_jobs(spooler, "A", [1], status=SPOOLING)
+    add_jobs(spooler, "A", [2])
+
+    assert manager.service_queue("A") == 'failover'
+
+    assert job_ids(spooler, "A") == [1]
+    assert documents(spooler, "B") == ["Receipt 2"]
+
+
+def test_no_healthy_peer_keeps_every_job():
+    spooler = SimulatedSpooler(["A", "B"])
+    manager = make_manager(spooler, {'kitchen': ["A", "B"]})
+    spooler.printers["A"]['status'] = PAPER_JAM
+    spooler.printers["B"]['status'] = OFFLINE
+    add_jobs(spooler, "A", [1, 2, 3])
+
+    assert manager.service_queue("A") == 'failover_pending'
+    assert manager.check_queue("A") is False
+
+    assert job_ids(spooler, "A") == [1, 2, 3]
+    assert job_ids(spooler, "B") == []
+
+
+def test_partial_transfer_keeps_failed_job_resumed():
+    class FailingSpooler(SimulatedSpooler):
+        def ReadPrinter(self, handle, size):
+            if self.handles[handle][1] == 2:
+                raise Exception("The parameter is incorrect.")
+            return super().ReadPrinter(handle, size)
+
+    spooler = FailingSpooler(["A", "B"])
+    manager = make_manager(spooler, {'kitchen': ["A", "B"]})
+    spooler.printers["A"]['status'] = PAPER_JAM
+    add_jobs(spooler, "A", [1, 2, 3])
+
+    assert manager.service_queue("A") == 'failover_pending'
+
+    assert job_ids(spooler, "A") == [2]
+    assert not spooler.printers["A"]['jobs'][0]['Status'] & PAUSED
+    assert documents(spooler, "B") == ["Receipt 1", "Receipt 3"]
+    assert spooler.open_handles == 0
+
+
+def test_failed_delete_after_copy_never_resumes_or_copies_again():
+    class StuckDeleteSpooler(SimulatedSpooler):
+        fail_deletes = True
+
+        def SetJob(self, handle, job_id, level, info, command):
+            if self.fail_deletes and command == self.CONSTANTS['JOB_CONTROL_DELETE']:
+                raise Exception("Access is denied.")
+            return super().SetJob(handle, job_id, level, info, command)
+
+    spooler = StuckDeleteSpooler(["A", "B"])
+    manager = make_manager(spooler, {'kitchen': ["A", "B"]})
+    spooler.printers["A"]['status'] = OFFLINE
+    add_jobs(spooler, "A", [1])
+
+    # The copy counts as moved; the original stays paused so it can't print twice
+    assert manager.service_queue("A") == 'failover'
+    assert job_ids(spooler, "A") == [1]
+    assert spooler.printers["A"]['jobs'][0]['Status'] & PAUSED
+    assert documents(spooler, "B") == ["Receipt 1"]
+
+    # Later passes only retry the delete
+    assert manager.service_queue("A") == 'failover_pending'
+    spooler.fail_deletes = False
+    assert manager.service_queue("A") == 'failover'
+    assert job_ids(spooler, "A") == []
+    assert documents(spooler, "B") == ["Receipt 1"]
+    assert spooler.open_handles == 0
+
+
+def test_pool_peers_are_failed_over_but_never_cleared():
+    spooler = SimulatedSpooler(["A", "B", "C"])
+    manager = make_manager(spooler, {'kitchen': ["A", "B", "C"]})
+    spooler.printers["B"]['status'] = PAPER_JAM
+    spooler.printers["C"]['status'] = OFFLINE
+    add_jobs(spooler, "B", [1, 2])
+    add_jobs(spooler, "C", [3, 4])
+    spooler.printers["A"]['status'] = 0
+
+    assert manager.service_pool_peers("A") == {'B': 'failover', 'C': 'failover'}
+
+    # Both failed peers moved their jobs to A, the only healthy member
+    assert job_ids(spooler, "B") == []
+    assert job_ids(spooler, "C") == []
+    assert documents(spooler, "A") == ["Receipt 1", "Receipt 2", "Receipt 3", "Receipt 4"]
+
+    # With no healthy member left, a jammed peer's jobs are kept, not cleared
+    spooler.printers["A"]['status'] = OFFLINE
+    add_jobs(spooler, "B", [5, 6])
+    assert manager.service_pool_peers("A") == {'B': 'failover_pending'}
+    assert job_ids(spooler, "B") == [5, 6]
+
+
+def test_check_queue_never_purges_jammed_pooled_printer():
+    spooler = SimulatedSpooler(["A", "B"])
+    manager = make_manager(spooler, {'kitchen': ["A", "B"]})
+    spooler.printers["A"]['status'] = PAPER_JAM
+    spooler.printers["B"]['status'] = OFFLINE
+    add_jobs(spooler, "A", [1, 2])
+
+    assert manager.check_queue("A") is False
+    assert job_ids(spooler, "A") == [1, 2]
+
+    spooler.printers["B"]['status'] = 0
+    assert manager.check_queue("A") is True
+    assert job_ids(spooler, "A") == []
+    assert documents(spooler, "B") == ["Receipt 1", "Receipt 2"]
+
+
+def test_unpooled_printer_is_still_cleared():
+    spooler = SimulatedSpooler(["A"])
+    manager = make_manager(spooler, {})
+    add_jobs(spooler, "A", [1, 2, 3])
+
+    assert manager.service_queue("A") == 'cleared'
+    assert job_ids(spooler, "A") == []
@@ -0,0 +1,141 @@
+import gzip
+import shutil
+
+from src.printer_manager import PrinterManager
+from src.simulated_spooler import SimulatedSpooler
+from src.spooler_trace import (TraceRecorder, TraceReplay, VirtualClock, ReplayConfig,
+                               build_timelines, load_trace)
+
+CONSTANTS = SimulatedSpooler.CONSTANTS
+
+
+def record_run(spooler, trace_file, clock):
+    """Record one app run that polls and clears printer A"""
+    recorder = TraceRecorder(spooler.module(), str(trace_file), clock=clock)
+    manager = PrinterManager(ReplayConfig(), spooler=recorder, clock=clock)
+    manager.get_queue_snapshot("A")
+    clock.sleep(5)
+    manager.check_queue("A")
+    recorder.close()
+
+
+def add_jobs(spooler, printer, job_ids):
+    for job_id in job_ids:
+        spooler.printers[printer]['jobs'].append({
+            'JobId': job_id, 'Status': 0, 'pDocument': f"Receipt {job_id}",
+            'pDatatype': 'RAW', 'data': b''})
+
+
+def test_load_trace_reads_every_appended_run(tmp_path):
+    trace_file = tmp_path / "trace.jsonl.gz"
+    spooler = SimulatedSpooler(["A"])
+    clock = VirtualClock(1000.0)
+    add_jobs(spooler, "A", [1, 2])
+    record_run(spooler, trace_file, clock)
+    add_jobs(spooler, "A", [3])
+    record_run(spooler, trace_file, clock)
+
+    events = load_trace(str(trace_file))
+
+    assert [event['op'] for event in events if event['op'] == 'start'] == ['start', 'start']
+    purges = [event for event in events if event['op'] == 'SetPrinter']
+    assert len(purges) == 2
+    assert all(event['p'] == "A" for event in purges)
+
+
+def test_load_trace_recovers_truncated_trace(tmp_path):
+    trace_file = tmp_path / "trace.jsonl.gz"
+    spooler = SimulatedSpooler(["A"])
+    clock = VirtualClock()
+    add_jobs(spooler, "A", [1, 2])
+    record_run(spooler, trace_file, clock)
+    complete = load_trace(str(trace_file))
+    data = trace_file.read_bytes()
+
+    # A second run is killed after a flush: no gzip trailer, unflushed events lost
+    with gzip.open(trace_file, 'at', encoding='utf-8') as second_run:
+        second_run.write('{"op":"start","wall":0,"t":0}\n')
+        second_run.flush()
+        crashed = tmp_path / "crashed.jsonl.gz"
+        shutil.copyfile(trace_file, crashed)
+        second_run.write('{"op":"start","wall":1,"t":1}\n')
+
+    events = load_trace(str(crashed))
+    assert events == complete + [{'op': 'start', 'wall': 0, 't': 0}]
+
+    # Bytes cut off mid-stream still yield every intact event before the cut
+    cut = tmp_path / "cut.jsonl.gz"
+    cut.write_bytes(data[:len(data) - 12])
+    assert load_trace(str(cut)) == complete
+
+
+def enum_jobs(t, printer, job_ids):
+    return {'op': 'EnumJobs', 'p': printer, 't': t, 'r': [[job_id, 0, 'RAW'] for job_id in job_ids]}
+
+
+def test_build_timelines_deletion_rules():
+    events = [
+        # check_queue: EnumJobs, then a purge a few milliseconds later
+        enum_jobs(1.000, "A", [1, 2]),
+        {'op': 'SetPrinter', 'p': "A", 't': 1.004, 'c': CONSTANTS['PRINTER_CONTROL_PURGE']},
+        # Failover pauses and resumes jobs around a transfer; only cancel/delete remove them
+        enum_jobs(2.0, "B", [5, 6, 7, 8]),
+        {'op': 'SetJob', 'p': "B", 't': 2.1, 'j': 5, 'c': CONSTANTS['JOB_CONTROL_PAUSE']},
+        {'op': 'SetJob', 'p': "B", 't': 2.2, 'j': 5, 'c': CONSTANTS['JOB_CONTROL_RESUME']},
+        {'op': 'SetJob', 'p': "B", 't': 2.3, 'j': 6, 'c': CONSTANTS['JOB_CONTROL_DELETE']},
+        {'op': 'SetJob', 'p': "B", 't': 2.4, 'j': 7, 'c': CONSTANTS['JOB_CONTROL_CANCEL']},
+        # A call that failed changed nothing
+        {'op': 'SetJob', 'p': "B", 't': 2.5, 'j': 8, 'c': CONSTANTS['JOB_CONTROL_DELETE'],
+         'e': "Access is denied."},
+    ]
+
+    printers = build_timelines(events)
+
+    assert {job_id: job['deleted'] for job_id, job in printers["A"].jobs.items()} == {1: True, 2: True}
+    assert {job_id: job['deleted'] for job_id, job in printers["B"].jobs.items()} == {
+        5: False, 6: True, 7: True, 8: False}
+
+
+def sampled_trace():
+    """Printer A sampled every 10s for 300s
+
+    Job 1 prints on its own, jobs 2 and 3 sit in the queue until the end, and
+    jobs 4 and 5 leave together, job 4 removed by the recorded policy.
+    """
+    lifetimes = {1: (0, 20), 2: (30, 300), 3: (100, 300), 4: (230, 250), 5: (230, 250)}
+    events = [{'op': 'start', 'wall': 0, 't': 0}, {'op': 'sampling', 'interval': 10.0, 't': 0}]
+    for t in range(0, 301, 10):
+        events.append({'op': 'GetPrinter', 'p': "A", 't': t, 'r': [0, 0, 'Generic / Text Only']})
+        events.append(enum_jobs(t, "A", [job_id for job_id, (first, last) in lifetimes.items()
+                                         if first <= t <= last]))
+    events.append({'op': 'SetJob', 'p': "A", 't': 250.5, 'j': 4, 'c': CONSTANTS['JOB_CONTROL_DELETE']})
+    return events
+
+
+def test_trace_replay_metrics():
+    replay = TraceReplay(sampled_trace(), stuck_after=60.0)
+    assert replay.sample_period == 10.0
+
+    # Polls at 0, 60, ..., 300: jobs 2 and 3 are cleared at 120, jobs 4 and 5 at 240
+    metrics = replay.run(clear_threshold=1, interval=60.0)
+    assert metrics['polls'] == 6
+    assert metrics['undersampled'] is False
+    assert metrics['stuck_jobs'] == 2
+    assert metrics['missed_stuck_jobs'] == 0
+    assert metrics['false_clears'] == 1
+    assert metrics['ambiguous_clears'] == 1
+    assert metrics['latency_mean'] == 15.0
+    assert metrics['latency_max'] == 30.0
+
+    # A slower poll catches the stuck jobs later and never sees jobs 4 and 5
+    metrics = replay.run(clear_threshold=1, interval=300.0)
+    assert metrics['polls'] == 2
+    assert (metrics['false_clears'], metrics['ambiguous_clears']) == (0, 0)
+    assert metrics['latency_max'] == 210.0
+
+    assert replay.run(clear_threshold=1, interval=5.0)['undersampled'] is True
+
+
+def test_trace_replay_is_deterministic():
+    replay = TraceReplay(sampled_trace(), stuck_after=60.0)
+    assert replay.run(2, 30.0) == replay.run(2, 30.0)